@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+
+# Most per-alert lines listed in one digest message
+DIGEST_MAX_LINES = 10
+
+# Sends alerts from a background thread so the caller never waits on the network.
+# Alerts go into a bounded queue (full queue = alert dropped and counted), are grouped
+# by key (e.g. source IP + threat type) for coalesce_seconds, and each group goes out as
+# one message: the alert itself when it's alone, otherwise a digest. At most
+# rate_per_minute messages are sent; while over the limit, groups keep absorbing new
+# alerts. A failed send is retried with exponential backoff up to max_retries times.
+# send(text) must raise on failure.
+class AlertDispatcher:
+    def __init__(self, send, max_queue=1000, rate_per_minute=20, coalesce_seconds=10.0,
+                 max_retries=3, retry_backoff=1.0):
+        self.send = send
+        self.rate_per_minute = rate_per_minute
+        self.coalesce_seconds = coalesce_seconds
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._groups = {}  # key -> (first alert time, [(message, summary), ...])
+        self._tokens = float(rate_per_minute)
+        self._last_refill = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+        self.submitted = 0
+        self.dropped = 0
+        self.sent_messages = 0
+        self.sent_alerts = 0
+        self.failed_messages = 0
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+
+    # Stop the thread; alerts still queued or grouped are sent once each (no retries)
+    def stop(self, timeout=10.0):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    # Queue an alert without blocking; returns False when the queue is full and it was dropped
+    def submit(self, key, message, summary=None):
+        try:
+            self._queue.put_nowait((key, message, summary or message))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                print(f"[WARN] Alert queue full, {self.dropped} alerts dropped so far")
+            return False
+        self.submitted += 1
+        return True
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "grouped": sum(len(alerts) for _, alerts in list(self._groups.values())),
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "sent_messages": self.sent_messages,
+            "sent_alerts": self.sent_alerts,
+            "failed_messages": self.failed_messages
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                key, message, summary = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                pass
+            else:
+                self._add(key, message, summary)
+                # Take whatever else is queued before looking at the groups
+                while True:
+                    try:
+                        self._add(*self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            self._flush_due()
+
+        while True:
+            try:
+                self._add(*self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for key in list(self._groups):
+            self._deliver(key, retries=0)
+
+    def _add(self, key, message, summary):
+        if key not in self._groups:
+            self._groups[key] = (time.monotonic(), [])
+        self._groups[key][1].append((message, summary))
+
+    # Send every group older than the coalescing window, oldest first, while the rate limit allows
+    def _flush_due(self):
+        now = time.monotonic()
+        due = sorted((first_seen, key) for key, (first_seen, _) in self._groups.items()
+                     if now - first_seen >= self.coalesce_seconds)
+        for _, key in due:
+            if not self._take_token():
+                return
+            self._deliver(key, retries=self.max_retries)
+
+    # Token bucket refilled at rate_per_minute
+    def _take_token(self):
+        now = time.monotonic()
+        self._tokens = min(self.rate_per_minute, self._tokens + (now - self._last_refill) * self.rate_per_minute / 60.0)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _deliver(self, key, retries):
+        _, alerts = self._groups.pop(key)
+        text = alerts[0][0] if len(alerts) == 1 else self._digest(key, alerts)
+        for attempt in range(retries + 1):
+            try:
+                self.send(text)
+            except Exception as e:
+                print(f"[ERROR] Alert delivery failed (attempt {attempt + 1}/{retries + 1}): {str(e)}")
+                if attempt < retries and not self._stop.wait(self.retry_backoff * 2 ** attempt):
+                    continue
+                break
+            self.sent_messages += 1
+            self.sent_alerts += len(alerts)
+            return True
+        self.failed_messages += 1
+        return False
+
+    def _digest(self, key, alerts):
+        label = " / ".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+        lines = [f"⚠️ {len(alerts)} High-Risk Anomalies Detected: {label}"]
+        lines += [f"• {summary}" for _, summary in alerts[:DIGEST_MAX_LINES]]
+        if len(alerts) > DIGEST_MAX_LINES:
+            lines.append(f"… and {len(alerts) - DIGEST_MAX_LINES} more")
+        return "\n".join(lines)
@@ -1,79 +1,303 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
-from pydantic import BaseModel
-import pandas as pd
-from catboost import CatBoostClassifier
-
-# Initialize FastAPI app
-app = FastAPI()
-
-# Define the API key (you can change this to a secure value)
-API_KEY = "streaminglogfastapi"
-
-# Dependency to check the API key
-async def verify_api_key(x_api_key: str = Header(...)):
-    if x_api_key != API_KEY:
-        raise HTTPException(status_code=403, detail="Invalid API Key")
-    return x_api_key
-
-# Load the CatBoost model
-model = CatBoostClassifier()
-model.load_model("catboost_threat_model.cbm")
-
-# Define the features
-features = [
-    "Protocol", "Packet_Type", "Device_Information", "Network_Segment",
-    "Geo_location_Data", "Proxy_Information", "Log_Source",
-    "Packet_Length", "Packet_Count", "Flow_Duration", "Payload_Entropy",
-    "pca_anomaly_score"
-]
-
-# Define the input model for FastAPI
-class LogInput(BaseModel):
-    Protocol: str
-    Packet_Type: str
-    Device_Information: str
-    Network_Segment: str
-    Geo_location_Data: str
-    Proxy_Information: str
-    Log_Source: str
-    Packet_Length: float
-    Packet_Count: float
-    Flow_Duration: float
-    Payload_Entropy: float
-    pca_anomaly_score: float
-
-# Prediction endpoint with API key authentication
-@app.post("/predict", dependencies=[Depends(verify_api_key)])
-async def predict(log: LogInput):
-    try:
-        # Convert input to DataFrame
-        df = pd.DataFrame([log.dict()], columns=features)
-
-        # Perform prediction with CatBoost
-        prediction = model.predict(df)[0]
-        prediction_cleaned = str(prediction).strip("[']").strip("']")  # Remove [' and '] from the prediction
-        probabilities = model.predict_proba(df)[0]  # Get probabilities for each class
-        confidence = float(max(probabilities))  # Use the highest probability as the confidence score
-
-        # Calculate risk flag
-        anomaly_score = log.pca_anomaly_score
-        risk = (
-            "CRITICAL" if prediction_cleaned != "Normal" and anomaly_score > 0.05
-            else "HIGH" if prediction_cleaned != "Normal"
-            else "MEDIUM" if anomaly_score > 0.05
-            else "LOW"
-        )
-
-        # Return the result
-        return {
-            "Predicted_Traffic_Type": prediction_cleaned,  # Use the cleaned prediction
-            "Anomaly_Score": anomaly_score,
-            "Risk_Flag": risk,
-            "Confidence_Score": confidence  # Add confidence score to response
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
-
-if __name__ == "__main__":
-    import uvicorn
+import asyncio
+import os
+import time
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Depends, Header, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+import inference
+from inference_pool import InferencePool, PoolSaturatedError
+from metrics import MetricsRegistry, SamplingProfiler, SIZE_BUCKETS
+from micro_batcher import MicroBatcher
+from prediction_cache import PredictionCache
+from quantile_sketch import RollingQuantileThreshold
+
+# Initialize FastAPI app
+app = FastAPI()
+
+# Define the API key (you can change this to a secure value)
+API_KEY = "streaminglogfastapi"
+
+# Dependency to check the API key
+async def verify_api_key(x_api_key: str = Header(...)):
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid API Key")
+    return x_api_key
+
+# Serving configuration
+MODEL_PATH = os.getenv("MODEL_PATH", inference.MODEL_PATH)
+PCA_DETECTOR_PATH = os.getenv("PCA_DETECTOR_PATH", inference.DETECTOR_PATH)  # Used when it exists
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))  # Largest number of logs accepted by /predict_batch
+
+# Micro-batching for concurrent /predict calls (set MICRO_BATCH_MAX_SIZE=1 to disable)
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+# Inference worker pool: "thread" or "process", worker count defaults to the CPU count
+INFERENCE_POOL_KIND = os.getenv("INFERENCE_POOL_KIND", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+INFERENCE_THREADS_PER_WORKER = int(os.getenv("INFERENCE_THREADS_PER_WORKER", "-1"))  # CatBoost thread_count
+INFERENCE_MAX_QUEUE_DEPTH = int(os.getenv("INFERENCE_MAX_QUEUE_DEPTH", "0"))  # 0 means unbounded
+
+# Optional prediction cache for repeated feature vectors (0 entries disables it)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "0"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300"))
+
+# Rolling anomaly threshold: percentile of recent anomaly scores, decaying with a half-life in events
+ANOMALY_PERCENTILE = float(os.getenv("ANOMALY_PERCENTILE", "95"))
+ANOMALY_THRESHOLD_HALF_LIFE = int(os.getenv("ANOMALY_THRESHOLD_HALF_LIFE", "100000"))
+ANOMALY_THRESHOLD_MIN_COUNT = int(os.getenv("ANOMALY_THRESHOLD_MIN_COUNT", "1000"))  # Use the detector's threshold until then (nothing is flagged without one)
+
+# Sampling profiler, idle until started through /profiler/start (API key required), so it can be
+# turned on in a running service; PROFILER_ENABLED=0 removes it altogether
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "1") == "1"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "300"))  # A profile stops by itself after this long
+
+# Metrics served on /metrics in the Prometheus text format
+metrics = MetricsRegistry()
+REQUESTS = metrics.counter("api_requests_total", "HTTP requests by endpoint and status code", ["endpoint", "status"])
+ERRORS = metrics.counter("api_errors_total", "HTTP requests that ended in a 4xx/5xx, by endpoint and status code", ["endpoint", "status"])
+REQUEST_LATENCY = metrics.histogram("api_request_duration_seconds", "End-to-end request latency", ["endpoint"])
+# Stages: validation (body parsing, API key check and pydantic validation), dataframe, pca_score,
+# predict_proba, risk, inference_wait (time queued for or handing data to the pool) and threshold
+STAGE_LATENCY = metrics.histogram("api_stage_duration_seconds", "Latency of each stage of a prediction", ["stage"])
+# kind="request" is the size of a /predict_batch body, kind="scored" the size of each batch scored by the pool
+BATCH_SIZE = metrics.histogram("api_batch_size", "Logs per batch", ["kind"], buckets=SIZE_BUCKETS)
+MODEL_INFO = metrics.gauge("api_model_info", "Loaded model version (always 1)", ["model_version"])
+POOL_QUEUE_DEPTH = metrics.gauge("api_inference_queue_depth", "Inference requests waiting for a worker")
+POOL_IN_FLIGHT = metrics.gauge("api_inference_in_flight", "Inference requests running on a worker")
+# Only the endpoints below get their own label; anything else is counted as "other"
+METRIC_ENDPOINTS = {"/predict", "/predict_batch", "/stats", "/reload_model", "/metrics", "/profiler", "/profiler/start", "/profiler/stop"}
+
+profiler = SamplingProfiler(interval=PROFILER_INTERVAL_MS / 1000.0)
+
+# Define the input model for FastAPI
+class LogInput(BaseModel):
+    Protocol: str
+    Packet_Type: str
+    Device_Information: str
+    Network_Segment: str
+    Geo_location_Data: str
+    Proxy_Information: str
+    Log_Source: str
+    Packet_Length: float
+    Packet_Count: float
+    Flow_Duration: float
+    Payload_Entropy: float
+    pca_anomaly_score: Optional[float] = None  # Computed server-side from the PCA detector when omitted
+
+# Inference runs on the worker pool so the event loop keeps serving other requests
+pool = InferencePool(
+    kind=INFERENCE_POOL_KIND,
+    max_workers=INFERENCE_WORKERS,
+    model_path=MODEL_PATH,
+    thread_count=INFERENCE_THREADS_PER_WORKER,
+    max_queue_depth=INFERENCE_MAX_QUEUE_DEPTH,
+    detector_path=PCA_DETECTOR_PATH
+)
+
+# Without a detector the client has to send the score, as before
+def check_anomaly_scores(logs):
+    if not pool.detector_loaded and any(log.pca_anomaly_score is None for log in logs):
+        raise HTTPException(status_code=422, detail="pca_anomaly_score is required (no PCA detector loaded)")
+
+async def score_logs(logs):
+    started = time.perf_counter()
+    columns = inference.columns_from_logs(logs)
+    collected = time.perf_counter()
+    results, timings = await pool.run(inference.score_columns_timed, columns)
+    timings["inference_wait"] = max(0.0, time.perf_counter() - collected - sum(timings.values()))
+    timings["dataframe"] += collected - started  # Collecting the columns is part of building the frame
+    for stage, seconds in timings.items():
+        STAGE_LATENCY.labels(stage).observe(seconds)
+    BATCH_SIZE.labels("scored").observe(len(logs))
+    return results
+
+cache = PredictionCache(
+    inference.features,
+    max_entries=PREDICTION_CACHE_SIZE,
+    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS
+) if PREDICTION_CACHE_SIZE > 0 else None
+
+# Serve repeated feature vectors from the cache and score only the misses
+async def score_logs_cached(logs, score):
+    if cache is None:
+        return await score(logs)
+    keys = [cache.key(log) for log in logs]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        model_version = cache.model_version
+        scored = await score([logs[i] for i in missing])
+        for i, result in zip(missing, scored):
+            # Don't store results from a model that was swapped out mid-request
+            if cache.model_version == model_version:
+                cache.put(keys[i], result)
+            results[i] = result
+    return results
+
+anomaly_threshold = RollingQuantileThreshold(
+    percentile=ANOMALY_PERCENTILE,
+    half_life=ANOMALY_THRESHOLD_HALF_LIFE,
+    min_count=ANOMALY_THRESHOLD_MIN_COUNT
+)
+
+# Flag each score against the current threshold, then fold the scores into it
+def flag_anomalies(results):
+    started = time.perf_counter()
+    scores = [result["Anomaly_Score"] for result in results]
+    flags = anomaly_threshold.flag(scores).tolist()
+    anomaly_threshold.update(scores)
+    for result, flag in zip(results, flags):
+        result["Anomaly_Flag"] = flag
+    STAGE_LATENCY.labels("threshold").observe(time.perf_counter() - started)
+    return results
+
+# Start the rolling threshold from the one fitted with the PCA detector (loads the detector
+# from disk, so it is run off the event loop)
+def reset_anomaly_threshold():
+    anomaly_threshold.initial = inference.load_detector(pool.detector_path).threshold if pool.detector_loaded else None
+
+# Single-row requests are queued and scored together by the micro-batcher
+batcher = MicroBatcher(
+    score_logs,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS
+)
+
+async def submit_to_batcher(logs):
+    return [await batcher.submit(log) for log in logs]
+
+def set_model_info():
+    MODEL_INFO.clear()
+    MODEL_INFO.labels(pool.model_version).set(1)
+
+# Model loading happens here, once per worker, rather than at import time
+@app.on_event("startup")
+async def startup():
+    pool.start()
+    if cache is not None:
+        cache.set_model_version(pool.model_version)
+    reset_anomaly_threshold()
+    set_model_info()
+    await batcher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await batcher.stop()
+    profiler.stop()
+    pool.shutdown()
+
+# Count and time every request; the start time also marks the beginning of validation
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    request.state.received_at = time.perf_counter()
+    endpoint = request.url.path if request.url.path in METRIC_ENDPOINTS else "other"
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS.labels(endpoint, status).inc()
+        if status >= 400:
+            ERRORS.labels(endpoint, status).inc()
+        REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - request.state.received_at)
+
+# Everything between the request arriving and the handler running: body parsing, API key, pydantic
+def observe_validation(request):
+    STAGE_LATENCY.labels("validation").observe(time.perf_counter() - request.state.received_at)
+
+# Prediction endpoint with API key authentication
+@app.post("/predict", dependencies=[Depends(verify_api_key)])
+async def predict(log: LogInput, request: Request):
+    observe_validation(request)
+    check_anomaly_scores([log])
+    try:
+        # Score this log on its own when micro-batching is disabled
+        score = score_logs if MICRO_BATCH_MAX_SIZE <= 1 else submit_to_batcher
+        return flag_anomalies(await score_logs_cached([log], score))[0]
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+# Batch prediction endpoint: one DataFrame and one predict_proba pass for the whole batch
+@app.post("/predict_batch", dependencies=[Depends(verify_api_key)])
+async def predict_batch(logs: List[LogInput], request: Request):
+    observe_validation(request)
+    BATCH_SIZE.labels("request").observe(len(logs))
+    if len(logs) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(logs)} logs (max {MAX_BATCH_SIZE})")
+    if not logs:
+        return []
+    check_anomaly_scores(logs)
+    try:
+        return flag_anomalies(await score_logs_cached(logs, score_logs))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+# Micro-batching, worker pool (queue depth, saturation) and cache statistics
+@app.get("/stats", dependencies=[Depends(verify_api_key)])
+async def stats():
+    return {
+        "micro_batcher": batcher.stats(),
+        "inference_pool": pool.stats(),
+        "prediction_cache": cache.stats() if cache is not None else None,
+        "anomaly_threshold": anomaly_threshold.stats()
+    }
+
+# Reload the model and PCA detector from disk; the prediction cache is flushed if the model changed
+@app.post("/reload_model", dependencies=[Depends(verify_api_key)])
+async def reload_model():
+    try:
+        # Loads the new model off the event loop; requests keep being served by the old one
+        await asyncio.get_running_loop().run_in_executor(None, pool.reload)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+    if cache is not None:
+        cache.set_model_version(pool.model_version)
+    await asyncio.get_running_loop().run_in_executor(None, reset_anomaly_threshold)
+    set_model_info()
+    return {"model_version": pool.model_version}
+
+# Request, error, stage latency and batch size metrics in the Prometheus text format. Served
+# without the API key, like any Prometheus target, so a plain scrape job can read it
+@app.get("/metrics")
+async def get_metrics():
+    POOL_QUEUE_DEPTH.labels().set(pool.queue_depth())
+    POOL_IN_FLIGHT.labels().set(pool.in_flight())
+    return PlainTextResponse(metrics.render(), media_type=MetricsRegistry.content_type)
+
+def check_profiler_enabled():
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiler is disabled (PROFILER_ENABLED=0)")
+
+# Start sampling stacks in this process (the web app and, with the thread pool, inference);
+# process pool workers are not sampled. The profile stops after `seconds` or on /profiler/stop.
+@app.post("/profiler/start", dependencies=[Depends(verify_api_key)])
+async def start_profiler(interval_ms: float = PROFILER_INTERVAL_MS, seconds: float = PROFILER_MAX_SECONDS):
+    check_profiler_enabled()
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    profiler.start(interval=max(interval_ms, 1.0) / 1000.0, duration=min(seconds, PROFILER_MAX_SECONDS))
+    return profiler.stats()
+
+@app.post("/profiler/stop", dependencies=[Depends(verify_api_key)])
+async def stop_profiler():
+    check_profiler_enabled()
+    profiler.stop()
+    return profiler.stats()
+
+# The last profile as collapsed stacks (flamegraph.pl / speedscope input)
+@app.get("/profiler", dependencies=[Depends(verify_api_key)])
+async def get_profile():
+    check_profiler_enabled()
+    return PlainTextResponse(profiler.collapsed())
+
+if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)  # Running on port 8001
\ No newline at end of file
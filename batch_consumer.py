@@ -1,160 +1,363 @@
-import json
-import time
-import sqlite3
-import requests
-import pandas as pd  # Added for NaN handling
-from azure.eventhub import EventHubConsumerClient
-from azure.eventhub import EventData
-from slack_sdk import WebClient
-
-# Azure Event Hubs connection details
-connection_str = "******"
-eventhub_name = "stream1"
-consumer_group = "consumer_test"
-
-# Slack configuration
-SLACK_TOKEN = "***"
-SLACK_CHANNEL = "**"
-slack_client = WebClient(token=SLACK_TOKEN)
-
-# SQLite database setup
-conn = sqlite3.connect("logs.db")
-cursor = conn.cursor()
-
-# Batch processing configuration
-BATCH_SIZE = 5
-BATCH_TIMEOUT = 3.0  # seconds
-
-# Function to send Slack notification
-def send_slack_notification(message):
-    try:
-        response = slack_client.chat_postMessage(channel=SLACK_CHANNEL, text=message)
-        if not response["ok"]:
-            print(f"[ERROR] Slack notification failed: {response['error']}")
-    except Exception as e:
-        print(f"[ERROR] Slack notification failed: {str(e)}")
-
-# Callback for processing event batches
-def on_event_batch(partition_context, events):
-    if not events:
-        print(f"No events received. Waiting {BATCH_TIMEOUT} seconds before processing the next batch...")
-        return
-
-    for event in events:
-        try:
-            # Parse event data
-            event_str = event.body_as_str()
-            # Replace various forms of NaN with '0.0' to make it JSON-compliant
-            event_str = event_str.replace('nan', '0.0').replace('NaN', '0.0').replace('NAN', '0.0')
-            log = json.loads(event_str)
-            # Convert to DataFrame to handle any remaining NaN values
-            df = pd.DataFrame([log])
-            df = df.fillna(0.0)  # Replace NaN with 0.0
-            log = df.to_dict('records')[0]  # Convert back to dictionary
-            log['log_id'] = f"{log.get('Timestamp')}_{log.get('Source_IP_Address')}_{log.get('Destination_IP_Address')}"
-        except Exception as e:
-            print(f"[SKIP] Malformed log: {str(e)}")
-            continue
-
-        # Check for duplicates
-        cursor.execute("SELECT log_id FROM logs WHERE log_id = ?", (log['log_id'],))
-        if cursor.fetchone():
-            print(f"[SKIP] Duplicate log: {log['log_id']}")
-            continue
-
-        # Make prediction request
-        api_url = "http://localhost:8001/predict"  # Updated to port 8001
-        headers = {"x-api-key": "streaminglogfastapi"}
-        start_time = time.time()
-        response = requests.post(api_url, json=log, headers=headers)
-        api_time = time.time() - start_time
-
-        if response.status_code == 200:
-            prediction = response.json()
-            pred_cleaned = prediction.get("Predicted_Traffic_Type", "Unknown").strip("[']").strip("']")
-            anomaly_score = float(prediction.get("Anomaly_Score", 0.0))
-            risk = prediction.get("Risk_Flag", "LOW")
-            confidence = float(prediction.get("Confidence_Score", 0.0))  # Extract confidence score
-        else:
-            print(f"[ERROR] API request failed with status {response.status_code}: {response.text}")
-            pred_cleaned = "Unknown"
-            anomaly_score = 0.0
-            risk = "LOW"
-            confidence = 0.0  # Default to 0.0 if API fails
-
-        # Prepare risk display
-        risk_display = (
-            f"\033[92mRisk: {risk:<9}\033[0m | Time: {log.get('Timestamp')} | "
-            f"Proto: {log.get('Protocol'):<5} | Src IP: {log.get('Source_IP_Address'):<15} | "
-            f"Dst IP: {log.get('Destination_IP_Address'):<15} | Anomaly: {anomaly_score:.3f} | "
-            f"Prediction: {pred_cleaned:<20} | API Time: {api_time:.3f}s"
-        )
-        print(risk_display)
-
-        # Insert into database
-        try:
-            cursor.execute("""
-                INSERT INTO logs (timestamp, source_ip, destination_ip, protocol, anomaly_score, predicted_traffic_type, risk_flag, confidence_score, log_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                log.get('Timestamp'),
-                log.get('Source_IP_Address'),
-                log.get('Destination_IP_Address'),
-                log.get('Protocol'),
-                anomaly_score,
-                pred_cleaned,
-                risk,
-                confidence,  # Add confidence score
-                log['log_id']
-            ))
-            conn.commit()
-        except sqlite3.IntegrityError:
-            print(f"[SKIP] Duplicate log: {log['log_id']}")
-            continue
-
-        # Send Slack notification for high-risk anomalies
-        if risk in ["HIGH", "CRITICAL"]:
-            alert_message = (
-                f"⚠️ High-Risk Anomaly Detected!\n"
-                f"Timestamp: {log.get('Timestamp')}\n"
-                f"Source IP: {log.get('Source_IP_Address')}\n"
-                f"Destination IP: {log.get('Destination_IP_Address')}\n"
-                f"Protocol: {log.get('Protocol')}\n"
-                f"Anomaly Score: {anomaly_score:.3f}\n"
-                f"Predicted Traffic Type: {pred_cleaned}\n"
-                f"Risk Flag: {risk}"
-            )
-            send_slack_notification(alert_message)
-
-    print(f"Processed batch of {len(events)} logs. Waiting {BATCH_TIMEOUT} seconds before processing the next batch...")
-
-    # Commenting out checkpoint update to avoid PermissionError
-    # if events:
-    #     partition_context.update_checkpoint(events[-1])
-
-# Callback for handling errors
-def on_error(partition_context, error):
-    print(f"[ERROR] Consumer error: {str(error)}")
-
-# Main consumer logic
-if __name__ == "__main__":
-    print("Listening in batch mode using consumer group")
-    client = EventHubConsumerClient.from_connection_string(
-        conn_str=connection_str,
-        consumer_group=consumer_group,
-        eventhub_name=eventhub_name
-    )
-
-    try:
-        with client:
-            client.receive_batch(
-                on_event_batch=on_event_batch,
-                on_error=on_error,
-                max_batch_size=BATCH_SIZE,
-                starting_position="@latest"
-            )
-    except KeyboardInterrupt:
-        print("Consumer stopped by user")
-    finally:
-        conn.close()
-        print("Database connection closed")
\ No newline at end of file
+import time
+import sqlite3
+from transport import create_consumer_client, LOCAL_BROKER_PATH, LOCAL_PARTITIONS
+from slack_sdk import WebClient
+from prediction_client import PredictionClient, EmbeddedPredictor, PredictionUnavailableError
+from log_store import LogStore
+from dedup_index import DedupIndex
+from event_codec import decode_events, produced_at
+from alert_dispatcher import AlertDispatcher
+from checkpoint_store import create_checkpoint_store
+from batch_stats import BatchStatsWriter
+
+# Azure Event Hubs connection details
+connection_str = "******"
+eventhub_name = "stream1"
+consumer_group = "consumer_test"
+STARTING_POSITION = "@latest"  # Used for partitions without a checkpoint
+
+# Transport: "eventhub" for Azure, "local" for the on-disk broker in transport.py
+TRANSPORT = "eventhub"
+LOCAL_BROKER = LOCAL_BROKER_PATH
+LOCAL_BROKER_PARTITIONS = LOCAL_PARTITIONS  # Partition count if the consumer creates the local hub
+
+# Checkpointing: per-partition offsets are saved after each committed DB batch, so a
+# restart resumes where processing stopped. "sqlite", "file" or None to disable.
+CHECKPOINT_STORE = "sqlite"
+CHECKPOINT_PATH = "logs.db"  # e.g. "checkpoints.json" for the file store
+
+# Slack configuration
+SLACK_TOKEN = "***"
+SLACK_CHANNEL = "**"
+SLACK_BASE_URL = "https://slack.com/api/"  # e.g. http://localhost:8089/api/ for slack_stub.py
+
+# Alert dispatch: alerts are sent from a background thread, bursts from the same
+# source IP and threat type are grouped into one digest message
+ALERT_QUEUE_SIZE = 1000  # Alerts beyond this are dropped (and counted) instead of blocking
+ALERT_RATE_PER_MINUTE = 20
+ALERT_COALESCE_SECONDS = 10.0
+ALERT_MAX_RETRIES = 3
+
+# SQLite database setup
+DB_PATH = "logs.db"
+DB_SYNCHRONOUS = "NORMAL"  # OFF / NORMAL / FULL / EXTRA; NORMAL is durable in WAL mode except on power loss
+DB_JOURNAL_MODE = "WAL"  # WAL lets the dashboard read while the consumer writes
+DB_ROLLUPS = True  # Update the dashboard's hourly/daily rollup tables in each batch's transaction
+
+# In-memory duplicate check, warm-started from the most recent stored logs
+DEDUP_MAX_ENTRIES = 500000
+
+# Batch processing configuration
+BATCH_SIZE = 5
+BATCH_TIMEOUT = 3.0  # seconds
+LOG_EACH_EVENT = True  # Print a line per log (turn off under load)
+
+# Per-batch stage timings, lag and events/s appended as JSON lines (None to disable);
+# summarize with: python batch_stats.py consumer_stats.jsonl
+STATS_PATH = "consumer_stats.jsonl"
+STATS_FLUSH_INTERVAL = 5.0  # seconds between writes to the stats file
+
+# Prediction API configuration
+API_URL = "http://localhost:8001"  # Updated to port 8001
+API_KEY = "streaminglogfastapi"
+API_MAX_IN_FLIGHT = 8  # Concurrent /predict calls when the batch endpoint is not used
+API_TIMEOUT = 10.0  # seconds per request
+API_RETRIES = 3  # Retries with exponential backoff on connection errors and 429/5xx
+USE_BATCH_ENDPOINT = True  # Send each batch to /predict_batch in one request
+
+# Inference mode: "http" calls the prediction API above, "embedded" loads the model
+# into the consumer and scores each batch in-process with the same risk rules
+INFERENCE_MODE = "http"
+MODEL_PATH = "catboost_threat_model.cbm"
+PCA_DETECTOR_PATH = "pca_detector.joblib"  # Scores logs without pca_anomaly_score when it exists
+EMBEDDED_THREAD_COUNT = -1  # CatBoost threads per consumer process (-1 = all cores)
+
+# Per-process resources, created by setup() so every consumer process (see
+# consumer_supervisor.py) gets its own database connection, client and alert thread
+slack_client = None
+prediction_client = None
+log_store = None
+dedup_index = None
+alert_dispatcher = None
+checkpoint_store = None
+stats_writer = None
+stats_callback = None  # Called with a dict of stats after every batch when set
+last_batch_time = {}  # partition_id -> when its previous batch finished, for events/s
+
+# Function to send Slack notification (raises on failure so the dispatcher retries)
+def send_slack_notification(message):
+    response = slack_client.chat_postMessage(channel=SLACK_CHANNEL, text=message)
+    if not response["ok"]:
+        raise RuntimeError(f"Slack notification failed: {response['error']}")
+
+def setup():
+    global slack_client, prediction_client, log_store, dedup_index, alert_dispatcher, checkpoint_store, stats_writer
+    slack_client = WebClient(token=SLACK_TOKEN, base_url=SLACK_BASE_URL)
+    if INFERENCE_MODE == "embedded":
+        prediction_client = EmbeddedPredictor(MODEL_PATH, PCA_DETECTOR_PATH, thread_count=EMBEDDED_THREAD_COUNT)
+    elif INFERENCE_MODE == "http":
+        prediction_client = PredictionClient(
+            base_url=API_URL,
+            api_key=API_KEY,
+            max_in_flight=API_MAX_IN_FLIGHT,
+            timeout=API_TIMEOUT,
+            retries=API_RETRIES,
+            use_batch_endpoint=USE_BATCH_ENDPOINT
+        )
+    else:
+        raise ValueError(f"Unknown INFERENCE_MODE {INFERENCE_MODE!r}, expected 'http' or 'embedded'")
+    log_store = LogStore(DB_PATH, synchronous=DB_SYNCHRONOUS, journal_mode=DB_JOURNAL_MODE, rollups=DB_ROLLUPS)
+    dedup_index = DedupIndex(max_entries=DEDUP_MAX_ENTRIES)
+    print(f"Dedup index warm-started with {dedup_index.warm_start(log_store)} recent logs")
+    alert_dispatcher = AlertDispatcher(
+        lambda message: send_slack_notification(message),
+        max_queue=ALERT_QUEUE_SIZE,
+        rate_per_minute=ALERT_RATE_PER_MINUTE,
+        coalesce_seconds=ALERT_COALESCE_SECONDS,
+        max_retries=ALERT_MAX_RETRIES
+    )
+    alert_dispatcher.start()
+    checkpoint_store = create_checkpoint_store(CHECKPOINT_STORE, CHECKPOINT_PATH)
+    stats_writer = BatchStatsWriter(STATS_PATH, flush_interval=STATS_FLUSH_INTERVAL) if STATS_PATH else None
+
+def teardown():
+    alert_dispatcher.stop()
+    if stats_writer is not None:
+        stats_writer.close()
+    prediction_client.close()
+    log_store.close()
+    if checkpoint_store is not None:
+        checkpoint_store.close()
+    print("Database connection closed")
+
+def create_client():
+    return create_consumer_client(
+        TRANSPORT,
+        eventhub_name,
+        consumer_group,
+        connection_str=connection_str,
+        checkpoint_store=checkpoint_store,
+        broker_path=LOCAL_BROKER,
+        partition_count=LOCAL_BROKER_PARTITIONS
+    )
+
+# Receive from one partition, or from all of them when partition_id is None (blocks until the client is closed)
+def receive(client, partition_id=None):
+    with client:
+        client.receive_batch(
+            on_event_batch=on_event_batch,
+            on_error=on_error,
+            max_batch_size=BATCH_SIZE,
+            starting_position=STARTING_POSITION,
+            partition_id=partition_id,
+            track_last_enqueued_event_properties=True  # For the lag in the batch stats
+        )
+
+# Callback for processing event batches
+def on_event_batch(partition_context, events):
+    if not events:
+        print(f"No events received. Waiting {BATCH_TIMEOUT} seconds before processing the next batch...")
+        return
+
+    # Seconds spent in each stage of this batch (see batch_stats.STAGES)
+    stages = {}
+    batch_start = mark = time.perf_counter()
+
+    # Decode events and drop duplicates before paying for inference
+    decoded_logs, errors = decode_events(events)
+    now = time.perf_counter()
+    stages["decode"] = now - mark
+    mark = now
+    for _, error in errors:
+        print(f"[SKIP] Malformed log: {error}")
+
+    decoded = {}
+    for log in decoded_logs:
+        # Check for duplicates within the batch
+        if log['log_id'] in decoded:
+            print(f"[SKIP] Duplicate log: {log['log_id']}")
+            continue
+        decoded[log['log_id']] = log
+
+    # Check for duplicates already stored: the in-memory index decides most logs, and the
+    # rest are looked up with one query for the whole batch
+    existing = set()
+    undecided = []
+    for log_id, log in decoded.items():
+        seen = dedup_index.lookup(log_id, log.get('Timestamp'))
+        if seen:
+            existing.add(log_id)
+        elif seen is None:
+            undecided.append(log_id)
+    if undecided:
+        existing.update(log_store.existing_log_ids(undecided))
+    for log_id in existing:
+        print(f"[SKIP] Duplicate log: {log_id}")
+    logs = [log for log_id, log in decoded.items() if log_id not in existing]
+    now = time.perf_counter()
+    stages["dedup"] = now - mark
+    mark = now
+
+    # Score the whole batch, over the pooled API client or in-process. Logs the service
+    # rejects come back as None and are stored unscored below
+    try:
+        predictions = prediction_client.predict_many(logs)
+    except PredictionUnavailableError as e:
+        # Raising makes the client restart this partition from its last checkpoint, so the
+        # batch is scored once the service is back rather than stored as Unknown
+        print(f"[ERROR] Prediction failed for batch of {len(logs)} logs: {str(e)}")
+        raise
+    now = time.perf_counter()
+    stages["inference"] = api_time = now - mark
+    mark = now
+
+    rows = []
+    alerts = []
+    for log, prediction in zip(logs, predictions):
+        if prediction is not None:
+            pred_cleaned = prediction.get("Predicted_Traffic_Type", "Unknown").strip("[']").strip("']")
+            anomaly_score = float(prediction.get("Anomaly_Score", 0.0))
+            risk = prediction.get("Risk_Flag", "LOW")
+            confidence = float(prediction.get("Confidence_Score", 0.0))  # Extract confidence score
+        else:
+            pred_cleaned = "Unknown"
+            anomaly_score = 0.0
+            risk = "LOW"
+            confidence = 0.0  # Default to 0.0 for a log the service rejected
+
+        # Prepare risk display
+        risk_display = (
+            f"\033[92mRisk: {risk:<9}\033[0m | Time: {log.get('Timestamp')} | "
+            f"Proto: {log.get('Protocol'):<5} | Src IP: {log.get('Source_IP_Address'):<15} | "
+            f"Dst IP: {log.get('Destination_IP_Address'):<15} | Anomaly: {anomaly_score:.3f} | "
+            f"Prediction: {pred_cleaned:<20}"
+        )
+        if LOG_EACH_EVENT:
+            print(risk_display)
+
+        rows.append((
+            log.get('Timestamp'),
+            log.get('Source_IP_Address'),
+            log.get('Destination_IP_Address'),
+            log.get('Protocol'),
+            anomaly_score,
+            pred_cleaned,
+            risk,
+            confidence,  # Add confidence score
+            log['log_id']
+        ))
+
+        # Queue Slack notifications for high-risk anomalies
+        if risk in ["HIGH", "CRITICAL"]:
+            alert_message = (
+                f"⚠️ High-Risk Anomaly Detected!\n"
+                f"Timestamp: {log.get('Timestamp')}\n"
+                f"Source IP: {log.get('Source_IP_Address')}\n"
+                f"Destination IP: {log.get('Destination_IP_Address')}\n"
+                f"Protocol: {log.get('Protocol')}\n"
+                f"Anomaly Score: {anomaly_score:.3f}\n"
+                f"Predicted Traffic Type: {pred_cleaned}\n"
+                f"Risk Flag: {risk}"
+            )
+            alert_summary = (
+                f"{log.get('Timestamp')} | {log.get('Destination_IP_Address')} | {log.get('Protocol')} | "
+                f"Anomaly {anomaly_score:.3f} | {risk}"
+            )
+            alerts.append(((log.get('Source_IP_Address'), pred_cleaned), alert_message, alert_summary))
+
+    now = time.perf_counter()
+    stages["prepare"] = now - mark
+    mark = now
+
+    # Insert the whole batch in one transaction; rows another consumer stored since the
+    # duplicate check are ignored by the log_id UNIQUE constraint and counted here
+    try:
+        inserted, duplicates = log_store.insert_batch(rows)
+    except sqlite3.Error as e:
+        # Raising makes the client restart this partition from its last checkpoint
+        print(f"[ERROR] Database write failed for batch of {len(rows)} logs: {str(e)}")
+        raise
+    commit_time = time.time()
+    now = time.perf_counter()
+    stages["db_write"] = db_time = now - mark
+    mark = now
+    for row in rows:
+        dedup_index.add(row[-1], row[0])
+    if duplicates:
+        print(f"[SKIP] {duplicates} duplicate logs already stored by another consumer")
+    now = time.perf_counter()
+    stages["dedup"] += now - mark
+    mark = now
+
+    # Hand alerts to the dispatcher once the batch is committed
+    for key, alert_message, alert_summary in alerts:
+        alert_dispatcher.submit(key, alert_message, alert_summary)
+    now = time.perf_counter()
+    stages["alerting"] = now - mark
+
+    print(f"Processed batch of {len(events)} logs | API Time: {api_time:.3f}s for {len(logs)} predictions | DB Time: {db_time:.3f}s for {inserted} inserts. Waiting {BATCH_TIMEOUT} seconds before processing the next batch...")
+
+    # Checkpoint only after the batch is committed, so a restart never skips unstored logs
+    mark = time.perf_counter()
+    try:
+        partition_context.update_checkpoint(events[-1])
+    except Exception as e:
+        print(f"[ERROR] Checkpoint update failed for partition {partition_context.partition_id}: {str(e)}")
+
+    now = time.perf_counter()
+    stages["checkpoint"] = now - mark
+
+    if stats_writer is None and stats_callback is None:
+        return
+    partition_id = partition_context.partition_id
+    last_enqueued = partition_context.last_enqueued_event_properties
+    lag = last_enqueued["sequence_number"] - events[-1].sequence_number if last_enqueued else None
+    # Events/s counts the wait for this batch too, so it is the partition's actual throughput
+    previous = last_batch_time.get(partition_id)
+    last_batch_time[partition_id] = now
+    batch_seconds = now - batch_start
+    if stats_writer is not None:
+        stats_writer.write({
+            "time": commit_time,
+            "partition_id": partition_id,
+            "events": len(events),
+            "malformed": len(errors),
+            "predictions": len(logs),
+            "inserted": inserted,
+            "lag": lag,
+            "batch_seconds": batch_seconds,
+            "events_per_second": len(events) / (now - previous) if previous is not None else None,
+            "stages": stages
+        })
+    if stats_callback is not None:
+        stats_callback({
+            "partition_id": partition_id,
+            "events": len(events),
+            "malformed": len(errors),
+            "predictions": len(logs),
+            "inserted": inserted,
+            "duplicates": len(events) - len(errors) - inserted,
+            "api_time": api_time,
+            "db_time": db_time,
+            "stages": stages,
+            "lag": lag,
+            "time": commit_time,
+            # Event built by batch_producer to DB commit (includes the producer's batching and pacing)
+            "latencies": [commit_time - sent for sent in map(produced_at, events) if sent is not None]
+        })
+
+# Callback for handling errors
+def on_error(partition_context, error):
+    print(f"[ERROR] Consumer error: {str(error)}")
+
+# Main consumer logic (single process, all partitions; see consumer_supervisor.py for one process per partition)
+if __name__ == "__main__":
+    print("Listening in batch mode using consumer group")
+    setup()
+    client = create_client()
+    try:
+        receive(client)
+    except KeyboardInterrupt:
+        print("Consumer stopped by user")
+    finally:
+        teardown()
\ No newline at end of file
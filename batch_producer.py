@@ -1,31 +1,229 @@
-import pandas as pd
-import json
-import time
-from azure.eventhub import EventHubProducerClient, EventData
-
-# Load data
-df_stream = pd.read_csv("pca_merged_logs.csv")
-logs_list = df_stream.to_dict(orient='records')
-
-# Azure Event Hub configuration
-connection_str = "********************1"
-eventhub_name = "stream1"
-
-# Create Event Hub producer
-producer = EventHubProducerClient.from_connection_string(
-    conn_str=connection_str,
-    eventhub_name=eventhub_name
-)
-
-# Define batch size
-BATCH_SIZE = 10
-
-# Stream logs in batches
-with producer:
-    for i in range(0, len(logs_list), BATCH_SIZE):
-        batch_logs = logs_list[i:i+BATCH_SIZE]
-        batch = [EventData(json.dumps(log, separators=(",", ":"))) for log in batch_logs]
-        producer.send_batch(batch)
-
-        print(f" Sent batch {i//BATCH_SIZE + 1} | Logs {i+1}–{i+len(batch)}")
-        time.sleep(1.0)  # Delay between batches
\ No newline at end of file
+import argparse
+import asyncio
+import itertools
+import time
+import zlib
+import pandas as pd
+from event_codec import encode_log, PRODUCED_AT_PROPERTY
+from transport import create_producer_client, create_event, LOCAL_BROKER_PATH, LOCAL_PARTITIONS
+
+# Azure Event Hub configuration
+connection_str = "********************1"
+eventhub_name = "stream1"
+
+# Transport: "eventhub" for Azure, "local" for the on-disk broker in transport.py
+TRANSPORT = "eventhub"
+
+# Producer configuration
+SOURCE_PATH = "pca_merged_logs.csv"
+CHUNK_SIZE = 10000  # Rows read from the source at a time
+RATE = 0  # Target events per second, 0 = unthrottled
+PARTITIONING = "round-robin"  # "round-robin", "key" or "hub" (let the service choose)
+PARTITION_KEY_FIELD = "Source_IP_Address"  # Used by key partitioning: one key always lands on one partition
+MAX_CONCURRENT_SENDS = 4  # In-flight send_batch calls in async mode
+SEND_INTERVAL = 0.1  # With a rate set, a batch holds at most this many seconds' worth of events
+
+# Stream the source in chunks so memory doesn't grow with its size
+def iter_logs(source, chunksize=CHUNK_SIZE, limit=None):
+    sent = 0
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        if limit is not None:
+            chunk = chunk.iloc[:limit - sent]
+        yield from chunk.to_dict(orient="records")
+        sent += len(chunk)
+        if limit is not None and sent >= limit:
+            return
+
+# Picks the partition for each event. Round-robin moves to the next partition each
+# time a batch is sent; key partitioning hashes PARTITION_KEY_FIELD (stable across runs).
+class PartitionRouter:
+    def __init__(self, partitioning, partition_ids, key_field=PARTITION_KEY_FIELD):
+        if partitioning not in ("round-robin", "key", "hub"):
+            raise ValueError(f"Unknown partitioning {partitioning!r}, expected 'round-robin', 'key' or 'hub'")
+        self.partitioning = partitioning
+        self.partition_ids = list(partition_ids)
+        self.key_field = key_field
+        self._next = itertools.cycle(self.partition_ids)
+        self.current = next(self._next) if partitioning == "round-robin" else None
+
+    def route(self, log):
+        if self.partitioning == "key":
+            key = str(log.get(self.key_field)).encode("utf-8")
+            return self.partition_ids[zlib.crc32(key) % len(self.partition_ids)]
+        return self.current
+
+    def batch_sent(self, partition_id):
+        if self.partitioning == "round-robin" and partition_id == self.current:
+            self.current = next(self._next)
+
+# Keeps the average send rate at `rate` events per second (no-op when rate is 0)
+class Pacer:
+    def __init__(self, rate):
+        self.rate = rate
+        self.start = time.perf_counter()
+
+    def delay(self, events_sent):
+        if not self.rate:
+            return 0.0
+        return max(0.0, self.start + events_sent / self.rate - time.perf_counter())
+
+def max_batch_events(rate):
+    return max(1, int(rate * SEND_INTERVAL)) if rate else None
+
+def report(events_sent, batches_sent, start_time, events_failed=0):
+    elapsed = time.perf_counter() - start_time
+    failed = f" | {events_failed} failed" if events_failed else ""
+    print(f" Sent {events_sent} logs in {batches_sent} batches | {elapsed:.1f}s | {events_sent / max(elapsed, 1e-9):,.0f} events/s{failed}")
+
+# Build one event. PRODUCED_AT_PROPERTY is stamped here because a batch serializes each event
+# as it is added, so the consumer's end-to-end latency includes the time the event waits in
+# its batch (at most SEND_INTERVAL with a rate set) and any pacing delay before the send.
+def make_event(transport, log):
+    return create_event(transport, encode_log(log), {PRODUCED_AT_PROPERTY: time.time()})
+
+# Fill one open batch per partition up to the hub's byte limit (via create_batch) and send it when
+# it's full, when it holds SEND_INTERVAL seconds' worth of events at the target rate, or at the end.
+# A batch that fails to send is reported and counted, and the replay carries on. Returns the
+# number of events sent successfully.
+def produce(producer, logs, partitioning=PARTITIONING, rate=RATE, transport=TRANSPORT):
+    router = PartitionRouter(partitioning, producer.get_partition_ids())
+    pacer = Pacer(rate)
+    limit = max_batch_events(rate)
+    batches = {}
+    events_sent = 0  # Including failed sends, for pacing
+    events_failed = 0
+    batches_sent = 0
+    start_time = time.perf_counter()
+
+    def send(partition_id):
+        nonlocal events_sent, events_failed, batches_sent
+        batch = batches.pop(partition_id)
+        time.sleep(pacer.delay(events_sent))
+        try:
+            producer.send_batch(batch)
+        except Exception as e:
+            print(f"[ERROR] Failed to send batch of {len(batch)} logs: {str(e)}")
+            events_failed += len(batch)
+        events_sent += len(batch)
+        batches_sent += 1
+        router.batch_sent(partition_id)
+        if batches_sent % 100 == 0:
+            report(events_sent, batches_sent, start_time, events_failed)
+
+    for log in logs:
+        partition_id = router.route(log)
+        event = make_event(transport, log)
+        if partition_id not in batches:
+            batches[partition_id] = producer.create_batch(partition_id=partition_id)
+        try:
+            batches[partition_id].add(event)
+        except ValueError:
+            send(partition_id)
+            partition_id = router.route(log)
+            batches[partition_id] = producer.create_batch(partition_id=partition_id)
+            try:
+                batches[partition_id].add(event)
+            except ValueError:
+                print(f"[SKIP] Log too large for one event: {log.get('Timestamp')}")
+                continue
+        if limit is not None and len(batches[partition_id]) >= limit:
+            send(partition_id)
+
+    for partition_id in list(batches):
+        if len(batches[partition_id]):
+            send(partition_id)
+    report(events_sent, batches_sent, start_time, events_failed)
+    return events_sent - events_failed
+
+# Same as produce() on the asyncio client, with up to max_concurrent sends in flight
+async def produce_async(producer, logs, partitioning=PARTITIONING, rate=RATE, max_concurrent=MAX_CONCURRENT_SENDS, transport=TRANSPORT):
+    router = PartitionRouter(partitioning, await producer.get_partition_ids())
+    pacer = Pacer(rate)
+    limit = max_batch_events(rate)
+    semaphore = asyncio.Semaphore(max_concurrent)
+    batches = {}
+    pending = set()
+    events_sent = 0  # Counted when a send starts, for pacing
+    events_failed = 0
+    batches_sent = 0
+    start_time = time.perf_counter()
+
+    async def send_one(batch):
+        nonlocal events_failed
+        try:
+            await producer.send_batch(batch)
+        except Exception as e:
+            print(f"[ERROR] Failed to send batch of {len(batch)} logs: {str(e)}")
+            events_failed += len(batch)
+        finally:
+            semaphore.release()
+
+    async def send(partition_id):
+        nonlocal events_sent, batches_sent
+        batch = batches.pop(partition_id)
+        await asyncio.sleep(pacer.delay(events_sent))
+        await semaphore.acquire()
+        task = asyncio.ensure_future(send_one(batch))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        events_sent += len(batch)
+        batches_sent += 1
+        router.batch_sent(partition_id)
+        if batches_sent % 100 == 0:
+            report(events_sent, batches_sent, start_time, events_failed)
+
+    for log in logs:
+        partition_id = router.route(log)
+        event = make_event(transport, log)
+        if partition_id not in batches:
+            batches[partition_id] = await producer.create_batch(partition_id=partition_id)
+        try:
+            batches[partition_id].add(event)
+        except ValueError:
+            await send(partition_id)
+            partition_id = router.route(log)
+            batches[partition_id] = await producer.create_batch(partition_id=partition_id)
+            try:
+                batches[partition_id].add(event)
+            except ValueError:
+                print(f"[SKIP] Log too large for one event: {log.get('Timestamp')}")
+                continue
+        if limit is not None and len(batches[partition_id]) >= limit:
+            await send(partition_id)
+
+    for partition_id in list(batches):
+        if len(batches[partition_id]):
+            await send(partition_id)
+    await asyncio.gather(*pending)
+    report(events_sent, batches_sent, start_time, events_failed)
+    return events_sent - events_failed
+
+async def main_async(args):
+    producer = create_producer_client(args.transport, eventhub_name, connection_str, args.broker_path, args.partitions, use_async=True)
+    async with producer:
+        await produce_async(producer, iter_logs(args.source, args.chunksize, args.limit), args.partitioning, args.rate, args.max_concurrent, args.transport)
+
+# Replay logs into the hub:
+#   python batch_producer.py --rate 5000 --partitioning key
+#   python batch_producer.py --transport local --partitions 4
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream logs from a CSV file into Event Hubs")
+    parser.add_argument("--source", default=SOURCE_PATH)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--limit", type=int, help="send at most this many logs")
+    parser.add_argument("--rate", type=float, default=RATE, help="target events per second (0 = unthrottled)")
+    parser.add_argument("--partitioning", choices=["round-robin", "key", "hub"], default=PARTITIONING)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="send with the asyncio client")
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT_SENDS, help="in-flight sends in async mode")
+    parser.add_argument("--transport", choices=["eventhub", "local"], default=TRANSPORT)
+    parser.add_argument("--broker-path", default=LOCAL_BROKER_PATH, help="local broker directory")
+    parser.add_argument("--partitions", type=int, default=LOCAL_PARTITIONS, help="partitions of a new local hub")
+    args = parser.parse_args()
+
+    if args.use_async:
+        asyncio.run(main_async(args))
+    else:
+        # Create the producer
+        producer = create_producer_client(args.transport, eventhub_name, connection_str, args.broker_path, args.partitions)
+        with producer:
+            produce(producer, iter_logs(args.source, args.chunksize, args.limit), args.partitioning, args.rate, args.transport)
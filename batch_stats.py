@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import threading
+import time
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library (slower, same results)
+    orjson = None
+
+# Stages of on_event_batch, in the order they run
+STAGES = ["decode", "dedup", "inference", "prepare", "db_write", "alerting", "checkpoint"]
+
+def _dumps(record):
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+# Appends one JSON line per consumer batch to a stats file. Records are buffered in
+# memory and written with a single append every flush_interval seconds (or once
+# max_buffer records are waiting), so the cost per batch is a dict and a list append.
+# The file is opened in append mode, so several consumer processes can share it.
+class BatchStatsWriter:
+    def __init__(self, path, flush_interval=5.0, max_buffer=1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+
+    # Records written after close() (e.g. a batch finishing during shutdown) are dropped
+    def write(self, record):
+        with self._lock:
+            if self._fd is None:
+                return
+            self._buffer.append(_dumps(record))
+            if len(self._buffer) >= self.max_buffer or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            if self._fd is not None:
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            os.write(self._fd, b"".join(self._buffer))
+            self.written += len(self._buffer)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._flush()
+                os.close(self._fd)
+                self._fd = None
+
+def read_stats(path):
+    with open(path, "rb") as f:
+        return [orjson.loads(line) if orjson is not None else json.loads(line) for line in f if line.strip()]
+
+# Per-stage share of the consumer's time and per-partition throughput and lag from a stats file
+def summarize(records):
+    stage_times = {stage: np.array([r["stages"].get(stage, 0.0) for r in records]) for stage in STAGES}
+    total = sum(times.sum() for times in stage_times.values()) or 1e-9
+    print(f"{len(records)} batches, {sum(r['events'] for r in records)} events")
+    print(f"  {'stage':<12} {'share':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage, times in stage_times.items():
+        p50, p95 = np.percentile(times, [50, 95]) * 1000
+        print(f"  {stage:<12} {times.sum() / total:>7.1%} {p50:>9.2f} {p95:>9.2f} {times.max() * 1000:>9.2f}")
+
+    partitions = {}
+    for r in records:
+        partitions.setdefault(r["partition_id"], []).append(r)
+    for partition_id, batches in sorted(partitions.items()):
+        span = batches[-1]["time"] - batches[0]["time"]
+        events = sum(b["events"] for b in batches[1:])  # Events after the first batch, over the span
+        rate = f"{events / span:,.1f} events/s" if span > 0 else "n/a"
+        print(f"  partition {partition_id}: {len(batches)} batches | {rate} | last lag {batches[-1]['lag']}")
+
+# Summarize a consumer stats file:
+#   python batch_stats.py consumer_stats.jsonl [--since 600]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize consumer batch stats")
+    parser.add_argument("path")
+    parser.add_argument("--since", type=float, help="only batches from the last N seconds")
+    args = parser.parse_args()
+
+    records = read_stats(args.path)
+    if args.since:
+        records = [r for r in records if r["time"] >= time.time() - args.since]
+    if not records:
+        print("No batches recorded")
+    else:
+        summarize(records)
@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic_logs import generate_logs
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+TOLERANCE = 0.15  # A benchmark regresses when its throughput drops more than this fraction below the baseline
+SINGLE_ROW_CALLS = 200  # /predict-style calls timed by catboost_single
+SCORE_BATCH_SIZE = 1000  # Logs per /predict_batch-style call
+INSERT_BATCH_SIZE = 500  # Rows per LogStore.insert_batch call
+
+RISK_FLAGS = np.array(["LOW", "MEDIUM", "HIGH", "CRITICAL"])
+
+# Rows of the logs table (init_db.py schema) built from generated logs
+def logs_table_rows(df, seed=0):
+    rng = np.random.default_rng(seed)
+    log_ids = df["Timestamp"] + "_" + df["Source_IP_Address"] + "_" + df["Destination_IP_Address"]
+    return list(zip(
+        df["Timestamp"], df["Source_IP_Address"], df["Destination_IP_Address"], df["Protocol"],
+        df["pca_anomaly_score"].astype(float), df["Traffic_Type"],
+        RISK_FLAGS[rng.integers(0, len(RISK_FLAGS), len(df))], rng.uniform(0.3, 1.0, len(df)), log_ids
+    ))
+
+def create_logs_db(directory):
+    subprocess.run([sys.executable, os.path.join(REPO_DIR, "init_db.py")], cwd=directory, check=True, stdout=subprocess.DEVNULL)
+    return os.path.join(directory, "logs.db")
+
+# The CatBoost model the API serves, or a small one trained on generated logs when it isn't there
+def load_or_train_model(model_path, n_rows):
+    import inference
+
+    if model_path and os.path.exists(model_path):
+        return inference.load_model(model_path), model_path
+    from catboost import CatBoostClassifier
+
+    df = generate_logs(min(n_rows, 50000), seed=1)
+    model = CatBoostClassifier(iterations=100, depth=6, verbose=0, thread_count=-1)
+    categorical = [f for f in inference.features if not pd.api.types.is_numeric_dtype(df[f])]
+    model.fit(df[inference.features], df["Traffic_Type"], cat_features=categorical)
+    return model, "trained on generated logs (100 iterations)"
+
+# Each benchmark gets the shared fixtures and returns a callable that does the timed work
+# plus the number of items that work processes
+def bench_pca_fit(fx):
+    from pca_anomaly_detector import fit_pca_detector, NUMERICAL_FEATURES, CATEGORICAL_FEATURES
+
+    df = fx["pca_df"]
+    return lambda: fit_pca_detector(df, NUMERICAL_FEATURES, CATEGORICAL_FEATURES), len(df)
+
+def bench_pca_score(fx):
+    from pca_anomaly_detector import fit_pca_detector, NUMERICAL_FEATURES, CATEGORICAL_FEATURES
+
+    df = fx["pca_df"]
+    detector, _ = fit_pca_detector(df, NUMERICAL_FEATURES, CATEGORICAL_FEATURES)
+    return lambda: detector.score(df), len(df)
+
+# One-row scoring as app.py does per /predict call: columns -> DataFrame -> predict_proba -> risk
+def bench_catboost_single(fx):
+    import inference
+
+    model = fx["model"]
+    logs = fx["logs"][:SINGLE_ROW_CALLS]
+
+    def run():
+        for log in logs:
+            inference.score_frame(model, pd.DataFrame(inference.columns_from_logs([log]), columns=inference.features))
+    return run, len(logs)
+
+def bench_catboost_batch(fx):
+    import inference
+
+    model = fx["model"]
+    batches = [fx["logs"][i:i + SCORE_BATCH_SIZE] for i in range(0, len(fx["logs"]), SCORE_BATCH_SIZE)]
+
+    def run():
+        for batch in batches:
+            inference.score_frame(model, pd.DataFrame(inference.columns_from_logs(batch), columns=inference.features))
+    return run, len(fx["logs"])
+
+def bench_event_decode(fx):
+    from event_codec import decode_events, encode_log
+    from transport import LocalEvent
+
+    events = [LocalEvent(encode_log(log), {}, i, str(i), 0.0) for i, log in enumerate(fx["logs"])]
+    return lambda: decode_events(events), len(events)
+
+# Dedup lookups for a stream where every other log was already stored
+def bench_dedup(fx):
+    from dedup_index import DedupIndex
+
+    rows = fx["rows"]
+    stored = [(row[-1], row[0]) for row in rows[::2]]
+
+    def run():
+        index = DedupIndex(max_entries=len(rows))
+        for log_id, timestamp in stored:
+            index.add(log_id, timestamp)
+        for row in rows:
+            if not index.lookup(row[-1], row[0]):
+                index.add(row[-1], row[0])
+    return run, len(rows)
+
+def bench_sqlite_insert(fx):
+    from log_store import LogStore
+
+    rows = fx["rows"]
+    batches = [rows[i:i + INSERT_BATCH_SIZE] for i in range(0, len(rows), INSERT_BATCH_SIZE)]
+
+    def run():
+        directory = tempfile.mkdtemp(prefix="bench_db_")
+        try:
+            store = LogStore(create_logs_db(directory))
+            start = time.perf_counter()
+            for batch in batches:
+                store.insert_batch(batch)
+            elapsed = time.perf_counter() - start
+            store.close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        return elapsed  # Only the inserts are timed, not creating the database
+    return run, len(rows)
+
+# The queries one dashboard.py refresh runs with every filter option selected and a date
+# range: summary, breakdowns and the daily anomaly series from the daily rollup table,
+# then the first page each of recent and high-risk logs from the indexed logs table
+def bench_dashboard_refresh(fx):
+    import sqlite3
+    from contextlib import closing
+    from log_store import has_rollup_tables
+    from dashboard_queries import (
+        RISK_LEVELS, THREAT_TYPES, PROTOCOLS, build_filters, high_risk_filters, aggregate_source,
+        query_summary, query_counts, query_anomaly_series, query_page
+    )
+
+    dates = ("2025-03-01", "2025-04-30")
+    where, params = build_filters(RISK_LEVELS, THREAT_TYPES, PROTOCOLS, "", dates)
+    high_where, high_params = high_risk_filters(where, params)
+    rollup_filters = build_filters(RISK_LEVELS, THREAT_TYPES, PROTOCOLS, "", dates, time_column="bucket")
+
+    def run():
+        with closing(sqlite3.connect(fx["db_path"])) as conn:
+            source, agg_where, agg_params, bucket_format = aggregate_source(has_rollup_tables(conn), False, rollup_filters, (where, params))
+            query_summary(conn, source, agg_where, agg_params)
+            query_counts(conn, "predicted_traffic_type", source, agg_where, agg_params)
+            query_counts(conn, "risk_flag", source, agg_where, agg_params)
+            query_anomaly_series(conn, source, agg_where, agg_params, bucket_format)
+            query_page(conn, where, params, 1)
+            query_page(conn, high_where, high_params, 1)
+    return run, len(fx["rows"])
+
+BENCHMARKS = {
+    "pca_fit": bench_pca_fit,
+    "pca_score": bench_pca_score,
+    "catboost_single": bench_catboost_single,
+    "catboost_batch": bench_catboost_batch,
+    "event_decode": bench_event_decode,
+    "dedup": bench_dedup,
+    "sqlite_insert": bench_sqlite_insert,
+    "dashboard_refresh": bench_dashboard_refresh,
+}
+
+def build_fixtures(n_rows, model_path, names, directory):
+    df = generate_logs(n_rows, seed=0)
+    rows = logs_table_rows(df)
+    fixtures = {"logs": df.to_dict(orient="records"), "rows": rows, "model_info": None}
+    if {"pca_fit", "pca_score"} & set(names):
+        fixtures["pca_df"] = generate_logs(n_rows, seed=0, categorical=True, include_ids=False)
+    if {"catboost_single", "catboost_batch"} & set(names):
+        fixtures["model"], fixtures["model_info"] = load_or_train_model(model_path, n_rows)
+    if "dashboard_refresh" in names:
+        from log_store import LogStore
+
+        store = LogStore(create_logs_db(directory))
+        store.insert_batch(rows)
+        store.close()
+        fixtures["db_path"] = create_logs_db(directory)  # Again, to gather planner statistics
+    return fixtures
+
+# Best of `repeat` runs; a benchmark callable may return its own timed seconds
+def time_benchmark(run, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        timed = run()
+        elapsed = time.perf_counter() - start
+        best = min(best, timed if isinstance(timed, float) else elapsed)
+    return best
+
+# Names of benchmarks whose throughput fell more than `tolerance` below the baseline
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        ratio = result["items_per_second"] / base["items_per_second"]
+        status = "REGRESSION" if ratio < 1 - tolerance else "ok"
+        print(f"  {name:<18} {base['items_per_second']:>14,.0f}/s -> {result['items_per_second']:>14,.0f}/s  ({ratio - 1:+.1%})  {status}")
+        if status == "REGRESSION":
+            regressions.append(name)
+    return regressions
+
+# Component benchmarks for the hot paths, on generated data:
+#   python -m benchmarks.components --rows 100000 --save-baseline
+#   python -m benchmarks.components --rows 100000 --compare   (exits 1 on a regression)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hot-path component benchmarks")
+    parser.add_argument("--rows", type=int, default=100000, help="generated logs per benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (best is kept)")
+    parser.add_argument("--only", help="comma-separated benchmark names (default: all)")
+    parser.add_argument("--model", default=os.path.join(REPO_DIR, "catboost_threat_model.cbm"), help="CatBoost model to benchmark")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the baseline and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+
+    directory = tempfile.mkdtemp(prefix="bench_")
+    try:
+        fixtures = build_fixtures(args.rows, args.model, names, directory)
+        results = {}
+        for name in names:
+            run, items = BENCHMARKS[name](fixtures)
+            seconds = time_benchmark(run, args.repeat)
+            results[name] = {"items": items, "seconds": seconds, "items_per_second": items / seconds}
+            print(f"{name:<18} {items:>10,} items | {seconds:8.3f}s | {items / seconds:>14,.0f} items/s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "run_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "rows": args.rows,
+        "model": fixtures["model_info"],
+        "benchmarks": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    exit_code = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"[WARN] No baseline at {args.baseline}; run with --save-baseline first")
+        else:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            if baseline.get("rows") != args.rows:
+                print(f"[WARN] Baseline was run with {baseline.get('rows')} rows, this run used {args.rows}")
+            print(f"Compared with baseline from {baseline.get('run_at')}:")
+            regressions = compare(results, baseline, args.tolerance)
+            if regressions:
+                print(f"[ERROR] Throughput regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+                exit_code = 1
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    sys.exit(exit_code)
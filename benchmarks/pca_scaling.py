@@ -0,0 +1,83 @@
+import argparse
+import json
+import multiprocessing
+import resource
+import time
+import tracemalloc
+import numpy as np
+from pca_anomaly_detector import fit_pca_detector, NUMERICAL_FEATURES, CATEGORICAL_FEATURES
+from benchmarks.synthetic_logs import generate_logs
+
+# Solver / dtype combinations compared at every size
+CONFIGS = [
+    ("auto", "float64"),
+    ("randomized", "float64"),
+    ("auto", "float32"),
+    ("randomized", "float32"),
+]
+
+def fit_and_score(df, svd_solver, dtype, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    detector, _ = fit_pca_detector(df, NUMERICAL_FEATURES, CATEGORICAL_FEATURES, svd_solver=svd_solver, dtype=np.dtype(dtype))
+    fit_seconds = time.perf_counter() - start_time
+    fit_peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+
+    if trace_memory:
+        tracemalloc.reset_peak()
+    start_time = time.perf_counter()
+    detector.score(df)
+    score_seconds = time.perf_counter() - start_time
+    score_peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    if trace_memory:
+        tracemalloc.stop()
+    return detector, fit_seconds, score_seconds, fit_peak, score_peak
+
+# Fit and score one configuration; runs in a fresh process so peak RSS is per case.
+# Timings come from an untraced run. A second run under tracemalloc (which sees numpy
+# allocations but slows Python code down) measures the fit and score phase peaks apart
+# from the memory held by the generated DataFrame itself.
+def run_case(n_rows, svd_solver, dtype):
+    df = generate_logs(n_rows, categorical=True, include_ids=False)
+    detector, fit_seconds, score_seconds, _, _ = fit_and_score(df, svd_solver, dtype, trace_memory=False)
+    _, _, _, fit_peak, score_peak = fit_and_score(df, svd_solver, dtype, trace_memory=True)
+
+    return {
+        "rows": n_rows,
+        "svd_solver": svd_solver,
+        "dtype": dtype,
+        "n_components": int(detector.pca.n_components_),
+        "fit_seconds": fit_seconds,
+        "score_seconds": score_seconds,
+        "fit_peak_mb": fit_peak / 1e6,
+        "score_peak_mb": score_peak / 1e6,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in KiB on Linux
+    }
+
+# Fit/score time and peak memory of the PCA detector at increasing sizes:
+#   python -m benchmarks.pca_scaling --rows 100000,1000000,10000000 --output pca_scaling.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PCA detector scaling benchmark")
+    parser.add_argument("--rows", default="100000,1000000,10000000", help="comma-separated row counts")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for n_rows in [int(value) for value in args.rows.split(",")]:
+        for svd_solver, dtype in CONFIGS:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_case, (n_rows, svd_solver, dtype))
+            results.append(result)
+            print(
+                f"{result['rows']:>10} rows | {svd_solver:<10} {dtype:<7} | "
+                f"fit {result['fit_seconds']:8.3f}s  score {result['score_seconds']:8.3f}s | "
+                f"fit peak {result['fit_peak_mb']:8.1f} MB  score peak {result['score_peak_mb']:8.1f} MB | "
+                f"max RSS {result['max_rss_mb']:8.1f} MB"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Value sets from synthetic_data_generation_code.py
+PROTOCOLS = ["TCP", "UDP", "ICMP", "HTTP", "HTTPS", "DNS", "SSH", "FTP", "SMTP", "RDP"]
+THREAT_TRAFFIC_TYPES = ["Brute Force", "Exploit", "DDoS", "Phishing", "Data Exfiltration", "Scanning"]
+THREAT_PACKET_TYPES = ["Threat", "Malware", "Scan"]
+DEVICE_TYPES = ["Firewall", "IDS", "IPS", "Router", "Server", "Workstation"]
+NETWORK_SEGMENTS = ["Corporate LAN", "DMZ", "Guest WiFi", "IoT Network", "Internal Network"]
+LOG_SOURCES = ["Firewall", "IDS", "IPS", "Proxy Server", "SIEM"]
+PROXY_INFO = ["No Proxy", "Proxy Detected", "TOR Exit Node", "Cloud Proxy"]
+MALWARE_INDICATORS = ["Mirai", "Emotet", "TrickBot", "Ryuk", "Zero-Day", "Ransomware", "Spyware", "Keylogger"]
+ATTACK_TYPES = ["T1190", "T1110", "T1071", "T1059", "T1027", "T1210", "T1046", "T1133"]
+COUNTRIES_ASN = {"US": "AS15169", "CN": "AS4134", "RU": "AS12389", "DE": "AS3320",
+                 "IR": "AS58224", "KP": "AS131279", "IN": "AS4755"}
+N_CITIES = 250
+
+def _pick(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+def _ips(rng, n, private):
+    first = np.full(n, 10) if private else rng.integers(11, 224, n)
+    octets = [pd.Series(first)] + [pd.Series(rng.integers(0, 256, n)) for _ in range(3)]
+    return octets[0].astype(str).str.cat([o.astype(str) for o in octets[1:]], sep=".").to_numpy()
+
+# Vectorized generator for logs in the pca_merged_logs.csv layout, with the same value
+# sets and threat/normal split (20% / 80%) as the Faker notebook, fast enough for
+# millions of rows. categorical=True keeps string columns as pandas categories and
+# include_ids=False skips the timestamp/IP columns when only the model features matter.
+def generate_logs(n_rows, seed=0, categorical=False, include_ids=True, start="2025-03-01", days=60):
+    rng = np.random.default_rng(seed)
+    n = n_rows
+    is_threat = rng.random(n) < 0.2
+
+    columns = {}
+    if include_ids:
+        offsets = rng.integers(0, days * 86400 * 1000000, n)
+        timestamps = pd.Timestamp(start) + pd.to_timedelta(np.sort(offsets), unit="us")
+        columns["Timestamp"] = timestamps.strftime("%Y-%m-%d %H:%M:%S.%f")
+        columns["Source_IP_Address"] = np.where(rng.random(n) < 0.5, _ips(rng, n, False), _ips(rng, n, True))
+        columns["Destination_IP_Address"] = _ips(rng, n, True)
+        columns["Source_Port"] = rng.integers(1024, 65536, n)
+        columns["Destination_Port"] = np.where(
+            is_threat, _pick(rng, [22, 80, 443, 3389, 53, 445, 1433], n), _pick(rng, [80, 443, 53], n)
+        ).astype(int)
+
+    columns["Protocol"] = _pick(rng, PROTOCOLS, n)
+    columns["Packet_Length"] = rng.integers(64, 1501, n)
+    columns["Packet_Count"] = np.where(is_threat, rng.integers(50, 501, n), rng.integers(1, 51, n))
+    columns["Flow_Duration"] = np.where(is_threat, rng.uniform(0.01, 2, n), rng.uniform(0.1, 10, n))
+    has_payload = rng.random(n) > 0.7
+    columns["Payload_Entropy"] = np.where(has_payload, rng.uniform(3.0, 4.3, n), 0.0)
+    columns["Packet_Type"] = np.where(is_threat, _pick(rng, THREAT_PACKET_TYPES, n), "Normal")
+    columns["Traffic_Type"] = np.where(is_threat, _pick(rng, THREAT_TRAFFIC_TYPES, n), "Normal")
+    columns["Malware_Indicators"] = np.where(is_threat & (rng.random(n) < 0.9), _pick(rng, MALWARE_INDICATORS, n), None)
+    columns["Anomaly_Scores"] = np.where(is_threat, rng.integers(50, 101, n), rng.integers(0, 31, n))
+    columns["Attack_Type"] = np.where(is_threat, _pick(rng, ATTACK_TYPES, n), "N/A")
+    columns["Device_Information"] = _pick(rng, DEVICE_TYPES, n)
+    columns["Network_Segment"] = _pick(rng, NETWORK_SEGMENTS, n)
+    geo = [f"{country}, City{i}, {asn}" for country, asn in COUNTRIES_ASN.items() for i in range(N_CITIES)]
+    columns["Geo_location_Data"] = _pick(rng, geo, n)
+    columns["Proxy_Information"] = _pick(rng, PROXY_INFO, n)
+    columns["Log_Source"] = _pick(rng, LOG_SOURCES, n)
+
+    # Scores shaped like the real pca_anomaly_score column: mostly small, with a long tail
+    scores = rng.exponential(0.01, n)
+    columns["pca_anomaly_score"] = scores
+    columns["pca_anomaly_flag"] = (scores > np.percentile(scores, 95)).astype(int) if n else np.zeros(0, dtype=int)
+
+    df = pd.DataFrame(columns)
+    if categorical:
+        for col, values in df.items():
+            if not pd.api.types.is_numeric_dtype(values) and col not in ("Timestamp", "Source_IP_Address", "Destination_IP_Address"):
+                df[col] = values.astype("category")
+    return df
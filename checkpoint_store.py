@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    from azure.eventhub import CheckpointStore
+except ImportError:  # Only the Event Hub client needs the base class; the local transport calls the same methods
+    CheckpointStore = object
+
+def _checkpoint_key(checkpoint):
+    return (checkpoint["fully_qualified_namespace"], checkpoint["eventhub_name"],
+            checkpoint["consumer_group"], checkpoint["partition_id"])
+
+# Event Hub checkpoint store kept in SQLite (by default next to the logs in logs.db).
+# Offsets are saved per partition after each committed DB batch, so a restarted consumer
+# resumes right after the last stored event. Ownership claims use etags, so consumers in
+# several processes sharing the same file balance partitions between them.
+class SqliteCheckpointStore(CheckpointStore):
+    def __init__(self, path="logs.db", busy_timeout=30.0):
+        self.path = path
+        self._lock = threading.Lock()  # The consumer client calls in from one thread per partition
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS eventhub_checkpoints (
+                fully_qualified_namespace TEXT,
+                eventhub_name TEXT,
+                consumer_group TEXT,
+                partition_id TEXT,
+                offset TEXT,
+                sequence_number INTEGER,
+                updated_at REAL,
+                PRIMARY KEY (fully_qualified_namespace, eventhub_name, consumer_group, partition_id)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS eventhub_ownership (
+                fully_qualified_namespace TEXT,
+                eventhub_name TEXT,
+                consumer_group TEXT,
+                partition_id TEXT,
+                owner_id TEXT,
+                last_modified_time REAL,
+                etag TEXT,
+                PRIMARY KEY (fully_qualified_namespace, eventhub_name, consumer_group, partition_id)
+            )
+        """)
+
+    def list_ownership(self, fully_qualified_namespace, eventhub_name, consumer_group, **kwargs):
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT partition_id, owner_id, last_modified_time, etag FROM eventhub_ownership
+                WHERE fully_qualified_namespace = ? AND eventhub_name = ? AND consumer_group = ?
+            """, (fully_qualified_namespace, eventhub_name, consumer_group)).fetchall()
+        return [{
+            "fully_qualified_namespace": fully_qualified_namespace,
+            "eventhub_name": eventhub_name,
+            "consumer_group": consumer_group,
+            "partition_id": partition_id,
+            "owner_id": owner_id,
+            "last_modified_time": last_modified_time,
+            "etag": etag
+        } for partition_id, owner_id, last_modified_time, etag in rows]
+
+    # Claim each ownership whose etag still matches the stored one (or that is new)
+    def claim_ownership(self, ownership_list, **kwargs):
+        claimed = []
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for ownership in ownership_list:
+                    key = _checkpoint_key(ownership)
+                    row = self.conn.execute("""
+                        SELECT etag FROM eventhub_ownership
+                        WHERE fully_qualified_namespace = ? AND eventhub_name = ? AND consumer_group = ? AND partition_id = ?
+                    """, key).fetchone()
+                    if row is not None and row[0] != ownership.get("etag"):
+                        continue
+                    ownership = dict(ownership, etag=str(uuid.uuid4()), last_modified_time=time.time())
+                    self.conn.execute("""
+                        INSERT OR REPLACE INTO eventhub_ownership
+                        (fully_qualified_namespace, eventhub_name, consumer_group, partition_id, owner_id, last_modified_time, etag)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, key + (ownership["owner_id"], ownership["last_modified_time"], ownership["etag"]))
+                    claimed.append(ownership)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def update_checkpoint(self, checkpoint, **kwargs):
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO eventhub_checkpoints
+                (fully_qualified_namespace, eventhub_name, consumer_group, partition_id, offset, sequence_number, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, _checkpoint_key(checkpoint) + (
+                None if checkpoint.get("offset") is None else str(checkpoint["offset"]),
+                checkpoint.get("sequence_number"),
+                time.time()
+            ))
+
+    def list_checkpoints(self, fully_qualified_namespace, eventhub_name, consumer_group, **kwargs):
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT partition_id, offset, sequence_number FROM eventhub_checkpoints
+                WHERE fully_qualified_namespace = ? AND eventhub_name = ? AND consumer_group = ?
+            """, (fully_qualified_namespace, eventhub_name, consumer_group)).fetchall()
+        return [{
+            "fully_qualified_namespace": fully_qualified_namespace,
+            "eventhub_name": eventhub_name,
+            "consumer_group": consumer_group,
+            "partition_id": partition_id,
+            "offset": offset,
+            "sequence_number": sequence_number
+        } for partition_id, offset, sequence_number in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# Same store as a JSON file, rewritten atomically on every change. Meant for a single
+# consumer process: it doesn't coordinate ownership with other processes.
+class FileCheckpointStore(CheckpointStore):
+    def __init__(self, path="checkpoints.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._checkpoints = {}
+        self._ownership = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            for checkpoint in data.get("checkpoints", []):
+                self._checkpoints[_checkpoint_key(checkpoint)] = checkpoint
+            for ownership in data.get("ownership", []):
+                self._ownership[_checkpoint_key(ownership)] = ownership
+
+    def _save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"checkpoints": list(self._checkpoints.values()), "ownership": list(self._ownership.values())}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def _matching(records, fully_qualified_namespace, eventhub_name, consumer_group):
+        return [dict(record) for key, record in records.items()
+                if key[:3] == (fully_qualified_namespace, eventhub_name, consumer_group)]
+
+    def list_ownership(self, fully_qualified_namespace, eventhub_name, consumer_group, **kwargs):
+        with self._lock:
+            return self._matching(self._ownership, fully_qualified_namespace, eventhub_name, consumer_group)
+
+    def claim_ownership(self, ownership_list, **kwargs):
+        claimed = []
+        with self._lock:
+            for ownership in ownership_list:
+                key = _checkpoint_key(ownership)
+                current = self._ownership.get(key)
+                if current is not None and current.get("etag") != ownership.get("etag"):
+                    continue
+                ownership = dict(ownership, etag=str(uuid.uuid4()), last_modified_time=time.time())
+                self._ownership[key] = ownership
+                claimed.append(ownership)
+            if claimed:
+                self._save()
+        return claimed
+
+    def update_checkpoint(self, checkpoint, **kwargs):
+        with self._lock:
+            self._checkpoints[_checkpoint_key(checkpoint)] = {
+                "fully_qualified_namespace": checkpoint["fully_qualified_namespace"],
+                "eventhub_name": checkpoint["eventhub_name"],
+                "consumer_group": checkpoint["consumer_group"],
+                "partition_id": checkpoint["partition_id"],
+                "offset": None if checkpoint.get("offset") is None else str(checkpoint["offset"]),
+                "sequence_number": checkpoint.get("sequence_number")
+            }
+            self._save()
+
+    def list_checkpoints(self, fully_qualified_namespace, eventhub_name, consumer_group, **kwargs):
+        with self._lock:
+            return self._matching(self._checkpoints, fully_qualified_namespace, eventhub_name, consumer_group)
+
+    def close(self):
+        pass
+
+# Build the store named in the consumer configuration ("sqlite", "file" or None for no checkpointing)
+def create_checkpoint_store(kind, path):
+    if kind is None:
+        return None
+    if kind == "sqlite":
+        return SqliteCheckpointStore(path)
+    if kind == "file":
+        return FileCheckpointStore(path)
+    raise ValueError(f"Unknown checkpoint store {kind!r}, expected 'sqlite', 'file' or None")
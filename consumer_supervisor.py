@@ -0,0 +1,135 @@
+import argparse
+import multiprocessing
+import queue
+import threading
+import time
+import batch_consumer
+from batch_stats import STAGES
+
+# Seconds between aggregated stats reports
+STATS_INTERVAL = 10.0
+# Seconds to wait before restarting a worker that exited
+RESTART_DELAY = 5.0
+
+# Worker process: owns one partition with its own Event Hub client, prediction client,
+# SQLite connection, dedup index and alert thread. Per-batch stats go back on stats_queue.
+# config overrides batch_consumer settings (e.g. {"TRANSPORT": "local"}) in the worker.
+def run_worker(partition_id, stats_queue, stop_event, config=None):
+    for name, value in (config or {}).items():
+        setattr(batch_consumer, name, value)
+    batch_consumer.setup()
+    batch_consumer.stats_callback = stats_queue.put
+    client = batch_consumer.create_client()
+    receiver = threading.Thread(target=batch_consumer.receive, args=(client, partition_id), daemon=True)
+    receiver.start()
+    try:
+        while receiver.is_alive() and not stop_event.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+        receiver.join(10)
+        batch_consumer.teardown()
+
+# Running totals per partition, reported every STATS_INTERVAL seconds
+class StatsAggregator:
+    def __init__(self):
+        self.partitions = {}
+        self.window_events = 0
+        self.window_inserted = 0
+        self.window_stages = dict.fromkeys(STAGES, 0.0)
+        self.window_start = time.time()
+
+    def add(self, stats):
+        partition = self.partitions.setdefault(stats["partition_id"], {
+            "events": 0, "inserted": 0, "duplicates": 0, "malformed": 0,
+            "api_time": 0.0, "db_time": 0.0, "lag": None, "last_batch": None
+        })
+        for field in ("events", "inserted", "duplicates", "malformed", "api_time", "db_time"):
+            partition[field] += stats[field]
+        partition["lag"] = stats["lag"]
+        partition["last_batch"] = stats["time"]
+        self.window_events += stats["events"]
+        self.window_inserted += stats["inserted"]
+        for stage, seconds in stats["stages"].items():
+            self.window_stages[stage] = self.window_stages.get(stage, 0.0) + seconds
+
+    def report(self):
+        elapsed = max(time.time() - self.window_start, 1e-9)
+        total_lag = sum(p["lag"] for p in self.partitions.values() if p["lag"] is not None)
+        print(
+            f"[STATS] {self.window_events / elapsed:,.1f} events/s | {self.window_inserted / elapsed:,.1f} inserts/s | "
+            f"total lag {total_lag} events across {len(self.partitions)} partitions"
+        )
+        # Share of the consumers' busy time per stage: the largest one saturates first
+        busy = sum(self.window_stages.values())
+        if busy > 0:
+            print("  stages: " + " | ".join(f"{stage} {seconds / busy:.0%}" for stage, seconds in self.window_stages.items()))
+        for partition_id, p in sorted(self.partitions.items()):
+            print(
+                f"  partition {partition_id}: {p['events']} events, {p['inserted']} inserted, {p['duplicates']} duplicates, "
+                f"{p['malformed']} malformed | API {p['api_time']:.1f}s DB {p['db_time']:.1f}s | lag {p['lag']}"
+            )
+        self.window_events = 0
+        self.window_inserted = 0
+        self.window_stages = dict.fromkeys(STAGES, 0.0)
+        self.window_start = time.time()
+
+# Start one worker process per partition, restart any that exit, and aggregate their stats:
+#   python consumer_supervisor.py [--partitions 0,1]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one consumer process per Event Hub partition")
+    parser.add_argument("--partitions", help="comma-separated partition ids (default: all partitions of the hub)")
+    args = parser.parse_args()
+
+    if args.partitions:
+        partition_ids = args.partitions.split(",")
+    else:
+        with batch_consumer.create_client() as client:
+            partition_ids = list(client.get_partition_ids())
+    print(f"Starting {len(partition_ids)} consumer processes for partitions {', '.join(partition_ids)}")
+
+    context = multiprocessing.get_context("spawn")
+    stats_queue = context.Queue()
+    stop_event = context.Event()
+    workers = {}
+    restart_at = {partition_id: 0.0 for partition_id in partition_ids}
+    aggregator = StatsAggregator()
+    next_report = time.time() + STATS_INTERVAL
+
+    try:
+        while True:
+            # (Re)start workers that aren't running
+            for partition_id in partition_ids:
+                worker = workers.get(partition_id)
+                if worker is not None and worker.is_alive():
+                    continue
+                if worker is not None:
+                    print(f"[WARN] Worker for partition {partition_id} exited with code {worker.exitcode}, restarting in {RESTART_DELAY}s")
+                    workers[partition_id] = None
+                    restart_at[partition_id] = time.time() + RESTART_DELAY
+                if time.time() >= restart_at[partition_id]:
+                    worker = context.Process(target=run_worker, args=(partition_id, stats_queue, stop_event),
+                                             name=f"consumer-{partition_id}")
+                    worker.start()
+                    workers[partition_id] = worker
+
+            try:
+                aggregator.add(stats_queue.get(timeout=0.5))
+                while True:
+                    aggregator.add(stats_queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if time.time() >= next_report:
+                aggregator.report()
+                next_report = time.time() + STATS_INTERVAL
+    except KeyboardInterrupt:
+        print("Supervisor stopped by user")
+    finally:
+        stop_event.set()
+        for worker in workers.values():
+            if worker is not None:
+                worker.join(30)
+        aggregator.report()
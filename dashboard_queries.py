@@ -0,0 +1,111 @@
+import re
+import pandas as pd
+from log_store import ROLLUP_TABLES
+
+# SQL behind the dashboard: filters, aggregates and log pages. Kept apart from dashboard.py
+# (which runs the Streamlit app when imported) so benchmarks/components.py times the same queries.
+
+# Sidebar filter options; all of them are selected by default
+RISK_LEVELS = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+THREAT_TYPES = ["Normal", "Data Exfiltration", "Brute Force", "Phishing", "DDoS", "Scanning"]
+PROTOCOLS = ["TCP", "UDP", "ICMP", "FTP", "DNS", "HTTP", "SMTP", "SSH", "HTTPS"]
+
+PAGE_SIZE = 50  # Rows per page of the Recent Logs and High-Risk tables
+HIGH_RISK_FLAGS = ["CRITICAL", "HIGH"]
+TABLE_COLUMNS = "timestamp, source_ip, destination_ip, protocol, anomaly_score, predicted_traffic_type, risk_flag, confidence_score, log_id"
+IPV4_PATTERN = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+# Consumer-maintained rollups the charts read from (see log_store.py)
+HOURLY_ROLLUPS = "log_rollups_hourly"
+DAILY_ROLLUPS = "log_rollups_daily"
+
+def day_start(day):
+    return pd.Timestamp(day).strftime("%Y-%m-%d")
+
+def next_day_start(day):
+    return (pd.Timestamp(day) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+# Compile the sidebar and chart filters into a parameterized WHERE clause. Timestamps are
+# stored as ISO strings, so date ranges compare as strings against the timestamp index
+# (or against the rollup bucket, a timestamp prefix, with time_column="bucket").
+def build_filters(risks, threats, protocols, source_ip, dates, threat_type=None, date=None, time_column="timestamp"):
+    clauses = []
+    params = []
+    for column, values in (("risk_flag", risks), ("predicted_traffic_type", threats), ("protocol", protocols)):
+        clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    source_ip = source_ip.strip()
+    if IPV4_PATTERN.match(source_ip):
+        # A whole address is looked up in the source_ip index
+        clauses.append("source_ip = ?")
+        params.append(source_ip)
+    elif source_ip:
+        escaped = source_ip.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        clauses.append("source_ip LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+    if len(dates) == 2:
+        clauses.append(f"{time_column} >= ? AND {time_column} < ?")
+        params.extend([day_start(dates[0]), next_day_start(dates[1])])
+    if threat_type:
+        clauses.append("predicted_traffic_type = ?")
+        params.append(threat_type)
+    if date:
+        clauses.append(f"{time_column} >= ? AND {time_column} < ?")
+        params.extend([day_start(date), next_day_start(date)])
+    return " AND ".join(clauses), params
+
+def high_risk_filters(where, params):
+    return f"{where} AND risk_flag IN ({', '.join('?' * len(HIGH_RISK_FLAGS))})", params + HIGH_RISK_FLAGS
+
+# Where the summary and chart aggregates come from: a rollup table (hourly when a single day
+# is shown, daily otherwise), so their cost follows the time range rather than the log volume.
+# A source IP filter needs the logs table, which is then shaped like a rollup. Returns
+# (table expression, WHERE clause, parameters, bucket format).
+def aggregate_source(use_rollups, hourly, rollup_filters, log_filters):
+    table = HOURLY_ROLLUPS if hourly else DAILY_ROLLUPS
+    bucket_format = "%Y-%m-%d %H" if hourly else "%Y-%m-%d"
+    if use_rollups:
+        return table, rollup_filters[0], rollup_filters[1], bucket_format
+    where, params = log_filters
+    source = (
+        f"(SELECT substr(timestamp, 1, {ROLLUP_TABLES[table]}) AS bucket, risk_flag, predicted_traffic_type, protocol, "
+        f"1 AS count, anomaly_score AS anomaly_sum, anomaly_score AS anomaly_max FROM logs WHERE {where})"
+    )
+    return source, "1", params, bucket_format
+
+# Total, high-risk and distinct threat type counts for the summary metrics
+def query_summary(conn, source, where, params):
+    high_where, high_params = high_risk_filters(where, params)
+    total, threat_types = conn.execute(
+        f"SELECT COALESCE(SUM(count), 0), COUNT(DISTINCT predicted_traffic_type) FROM {source} WHERE {where}", params
+    ).fetchone()
+    high_risk_count = conn.execute(f"SELECT COALESCE(SUM(count), 0) FROM {source} WHERE {high_where}", high_params).fetchone()[0]
+    return total, high_risk_count, threat_types
+
+def query_counts(conn, column, source, where, params):
+    return pd.read_sql_query(
+        f"SELECT {column}, SUM(count) AS count FROM {source} WHERE {where} GROUP BY {column} ORDER BY count DESC, {column}", conn, params=params
+    )
+
+# Mean and max anomaly score per bucket, the mean smoothed over 3 buckets
+def query_anomaly_series(conn, source, where, params, bucket_format):
+    df_agg = pd.read_sql_query(
+        f"SELECT bucket AS timestamp, SUM(anomaly_sum) / SUM(count) AS anomaly_score, MAX(anomaly_max) AS anomaly_max FROM {source} WHERE {where} GROUP BY bucket ORDER BY bucket",
+        conn, params=params
+    )
+    df_agg['timestamp'] = pd.to_datetime(df_agg['timestamp'], format=bucket_format)
+    df_agg['Anomaly_Score_Smoothed'] = df_agg['anomaly_score'].rolling(window=3, min_periods=1).mean()
+    return df_agg
+
+# One page of matching logs, newest first; ordering by timestamp lets the timestamp
+# index return the page in order instead of sorting every matching row
+def query_page(conn, where, params, page):
+    df = pd.read_sql_query(
+        f"SELECT {TABLE_COLUMNS} FROM logs WHERE {where} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+        conn, params=params + [PAGE_SIZE, (page - 1) * PAGE_SIZE]
+    )
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+def page_count(rows):
+    return max(1, -(-rows // PAGE_SIZE))
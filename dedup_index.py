@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+# Bounded in-memory index of recently stored log_ids, so the consumer can decide most
+# duplicate checks without reading SQLite. Entries are evicted oldest-first once
+# max_entries is reached. The index also tracks a watermark, covered_after: every stored
+# log whose Timestamp is later than it is known to be in the index. For those logs a
+# miss means "new" without a database read; older or undated logs are left undecided and
+# go to the database. Logs written by other consumers are not seen here, so the log_id
+# UNIQUE constraint in the database stays the final safety net.
+class DedupIndex:
+    def __init__(self, max_entries=500000):
+        self.max_entries = max_entries
+        self.covered_after = None  # None = every stored log is covered
+        self._seen = OrderedDict()  # log_id -> Timestamp
+        self._lock = threading.Lock()  # Shared by the consumer's partition threads
+        self.hits = 0
+        self.misses = 0
+        self.undecided = 0
+
+    # Load the most recent rows of the logs table so the index starts warm
+    def warm_start(self, log_store):
+        rows, covered_after = log_store.recent_log_ids(self.max_entries)
+        with self._lock:
+            self._seen.clear()
+            self.covered_after = covered_after
+            for log_id, timestamp in rows:
+                self._seen[log_id] = timestamp
+        return len(rows)
+
+    # True if log_id was stored, False if it is certainly new, None if the database has to be asked
+    def lookup(self, log_id, timestamp):
+        with self._lock:
+            if log_id in self._seen:
+                self.hits += 1
+                return True
+            if self.covered_after is None or (isinstance(timestamp, str) and timestamp > self.covered_after):
+                self.misses += 1
+                return False
+            self.undecided += 1
+            return None
+
+    # Record log_ids committed to the database
+    def add(self, log_id, timestamp):
+        with self._lock:
+            if log_id in self._seen:
+                return
+            self._seen[log_id] = timestamp
+            while len(self._seen) > self.max_entries:
+                _, evicted = self._seen.popitem(last=False)
+                # An evicted log is no longer in the index, so coverage now starts after it
+                if isinstance(evicted, str) and (self.covered_after is None or evicted > self.covered_after):
+                    self.covered_after = evicted
+                elif not isinstance(evicted, str) and self.covered_after is None:
+                    self.covered_after = ""
+
+    def stats(self):
+        return {
+            "entries": len(self._seen),
+            "max_entries": self.max_entries,
+            "covered_after": self.covered_after,
+            "hits": self.hits,
+            "misses": self.misses,
+            "undecided": self.undecided
+        }
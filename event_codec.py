@@ -0,0 +1,99 @@
+import json
+import math
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library (slower, same results)
+    orjson = None
+
+# Fields of app.LogInput, so decoded logs validate against the prediction API
+STRING_FIELDS = ["Protocol", "Packet_Type", "Device_Information", "Network_Segment",
+                 "Geo_location_Data", "Proxy_Information", "Log_Source"]
+FLOAT_FIELDS = ["Packet_Length", "Packet_Count", "Flow_Duration", "Payload_Entropy"]
+OPTIONAL_FLOAT_FIELDS = ["pca_anomaly_score"]  # Left out when missing; the API computes it
+MISSING_STRING = "Unknown"  # Used for a missing/null categorical value
+MISSING_FLOAT = 0.0  # Used for a missing/null/NaN/Infinity numeric value, as the consumer always has
+
+# Replace NaN/Infinity with None anywhere in a decoded value
+def _clean(value):
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _clean(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clean(item) for item in value]
+    return value
+
+def _to_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return MISSING_FLOAT
+    return value if math.isfinite(value) else MISSING_FLOAT
+
+# Parse one event body into a dict. orjson handles standard JSON; bodies with the
+# NaN/Infinity tokens older producers emit go through the standard parser, which reads
+# them as floats that are then cleaned to None.
+def _parse(body):
+    if orjson is not None:
+        try:
+            log = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            log = _clean(json.loads(body))
+    else:
+        log = _clean(json.loads(body))
+    if not isinstance(log, dict):
+        raise ValueError(f"expected a JSON object, got {type(log).__name__}")
+    return log
+
+# Coerce the LogInput fields in place and add the composite log_id. Every required
+# field is filled, so a decoded log always passes the API's validation.
+def normalize_log(log):
+    for field in STRING_FIELDS:
+        value = log.get(field)
+        log[field] = MISSING_STRING if value is None else str(value)
+    for field in FLOAT_FIELDS:
+        log[field] = _to_float(log.get(field))
+    for field in OPTIONAL_FLOAT_FIELDS:
+        if field in log:
+            log[field] = _to_float(log[field])
+    log['log_id'] = f"{log.get('Timestamp')}_{log.get('Source_IP_Address')}_{log.get('Destination_IP_Address')}"
+    return log
+
+def decode_log(body):
+    return normalize_log(_parse(body))
+
+# Decode a batch of Event Hub events. Returns (logs, errors) where errors holds
+# (event, message) for every event that couldn't be decoded.
+def decode_events(events):
+    logs = []
+    errors = []
+    for event in events:
+        try:
+            logs.append(decode_log(event.body_as_str()))
+        except (ValueError, TypeError, UnicodeDecodeError) as e:
+            errors.append((event, str(e)))
+    return logs, errors
+
+# numpy scalars (e.g. from DataFrame rows) for the standard-library encoder
+def _to_builtin(value):
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Encode a log as standard JSON bytes; NaN/Infinity become null
+def encode_log(log):
+    if orjson is not None:
+        return orjson.dumps(log, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_clean(log), separators=(",", ":"), allow_nan=False, default=_to_builtin).encode("utf-8")
+
+# Event property carrying the time the producer built the event (epoch seconds), for end-to-end latency
+PRODUCED_AT_PROPERTY = "produced_at"
+
+def produced_at(event):
+    properties = event.properties or {}
+    value = properties.get(PRODUCED_AT_PROPERTY, properties.get(PRODUCED_AT_PROPERTY.encode("utf-8")))
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
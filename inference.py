@@ -0,0 +1,140 @@
+import hashlib
+import os
+import time
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+from pca_anomaly_detector import PCAAnomalyDetector, DETECTOR_PATH
+
+# Default CatBoost model location
+MODEL_PATH = "catboost_threat_model.cbm"
+
+# Define the features
+features = [
+    "Protocol", "Packet_Type", "Device_Information", "Network_Segment",
+    "Geo_location_Data", "Proxy_Information", "Log_Source",
+    "Packet_Length", "Packet_Count", "Flow_Duration", "Payload_Entropy",
+    "pca_anomaly_score"
+]
+
+# Risk scoring configuration
+ANOMALY_SCORE_THRESHOLD = 0.05
+
+# Load the CatBoost model
+def load_model(model_path=MODEL_PATH):
+    model = CatBoostClassifier()
+    model.load_model(model_path)
+    return model
+
+# Load the persisted PCA detector if there is one; it scores logs sent without pca_anomaly_score
+def load_detector(detector_path=DETECTOR_PATH):
+    if not detector_path or not os.path.exists(detector_path):
+        return None
+    detector = PCAAnomalyDetector.load(detector_path)
+    unknown = [col for col in detector.all_features if col not in features]
+    if unknown:
+        raise ValueError(f"PCA detector uses features the API does not receive: {unknown}")
+    return detector
+
+# Fill in missing pca_anomaly_score values with one vectorized detector pass
+def fill_anomaly_scores(detector, df):
+    missing = df["pca_anomaly_score"].isna().to_numpy()
+    if missing.any():
+        if detector is None:
+            raise ValueError("pca_anomaly_score is required when no PCA detector is loaded")
+        scores = df["pca_anomaly_score"].to_numpy(dtype=float, copy=True)
+        scores[missing] = detector.score(df[missing])
+        df["pca_anomaly_score"] = scores
+    return df
+
+# Content hash of the model file, used to tell model versions apart
+def model_version(model_path=MODEL_PATH):
+    digest = hashlib.blake2b(digest_size=8)
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Calculate risk flags for a batch of predictions in one vectorized pass
+def calculate_risk(predictions, anomaly_scores):
+    is_threat = predictions != "Normal"
+    is_anomalous = anomaly_scores > ANOMALY_SCORE_THRESHOLD
+    return np.select(
+        [is_threat & is_anomalous, is_threat, is_anomalous],
+        ["CRITICAL", "HIGH", "MEDIUM"],
+        default="LOW"
+    )
+
+# Score a feature DataFrame with a single predict_proba call. When a timings dict is
+# passed, the seconds spent in predict_proba and in the risk/result step are added to it.
+def score_frame(model, df, thread_count=-1, timings=None):
+    started = time.perf_counter()
+    probabilities = model.predict_proba(df, thread_count=thread_count)  # Get probabilities for each class
+    predicted = time.perf_counter()
+    best = probabilities.argmax(axis=1)
+    predictions = model.classes_[best].astype(str)  # Same class model.predict would return
+    confidences = probabilities[np.arange(len(best)), best]  # Highest probability is the confidence score
+    anomaly_scores = df["pca_anomaly_score"].to_numpy(dtype=float)
+    risks = calculate_risk(predictions, anomaly_scores)
+
+    results = [
+        {
+            "Predicted_Traffic_Type": prediction,
+            "Anomaly_Score": anomaly_score,
+            "Risk_Flag": risk,
+            "Confidence_Score": confidence
+        }
+        for prediction, anomaly_score, risk, confidence in zip(
+            predictions.tolist(), anomaly_scores.tolist(), risks.tolist(), confidences.tolist()
+        )
+    ]
+    if timings is not None:
+        timings["predict_proba"] = timings.get("predict_proba", 0.0) + predicted - started
+        timings["risk"] = timings.get("risk", 0.0) + time.perf_counter() - predicted
+    return results
+
+# Collect feature columns from a list of logs (objects or dicts) without touching pandas,
+# so the payload handed to a worker is cheap to build and to pickle
+def columns_from_logs(logs):
+    if logs and isinstance(logs[0], dict):
+        return {feature: [log[feature] for log in logs] for feature in features}
+    return {feature: [getattr(log, feature) for log in logs] for feature in features}
+
+# Per-worker model state, set once by init_worker in each pool worker
+_worker_model = None
+_worker_detector = None
+_worker_thread_count = -1
+
+def init_worker(model_path=MODEL_PATH, thread_count=-1, detector_path=None):
+    set_worker_state(*load_worker_state(model_path, thread_count, detector_path))
+
+# Loading and installing are separate so a thread pool can load a new model while the
+# old one keeps serving, then switch over in one step
+def load_worker_state(model_path=MODEL_PATH, thread_count=-1, detector_path=None):
+    return load_model(model_path), load_detector(detector_path), thread_count
+
+def set_worker_state(model, detector, thread_count):
+    global _worker_model, _worker_detector, _worker_thread_count
+    _worker_model, _worker_detector, _worker_thread_count = model, detector, thread_count
+
+def worker_model():
+    if _worker_model is None:
+        raise RuntimeError("Inference worker has no model loaded")
+    return _worker_model
+
+# Entry point run inside a pool worker: build the frame and score it there
+def score_columns(columns):
+    return score_columns_timed(columns)[0]
+
+# Same as score_columns, also returning the seconds spent in each stage. The timings
+# travel back with the results so they work from process pool workers too.
+def score_columns_timed(columns):
+    timings = {}
+    started = time.perf_counter()
+    df = pd.DataFrame(columns, columns=features)
+    built = time.perf_counter()
+    df = fill_anomaly_scores(_worker_detector, df)
+    timings["dataframe"] = built - started
+    timings["pca_score"] = time.perf_counter() - built
+    results = score_frame(worker_model(), df, thread_count=_worker_thread_count, timings=timings)
+    return results, timings
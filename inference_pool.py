@@ -0,0 +1,128 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import inference
+
+# Raised when the pool already has max_queue_depth requests waiting
+class PoolSaturatedError(RuntimeError):
+    pass
+
+# Runs CatBoost inference off the asyncio event loop on a thread or process pool.
+# Threads share one model (CatBoost releases the GIL while predicting); processes
+# each load their own copy once, in the pool initializer.
+class InferencePool:
+    def __init__(self, kind="thread", max_workers=None, model_path=inference.MODEL_PATH,
+                 thread_count=-1, max_queue_depth=0, detector_path=None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.model_path = model_path
+        self.detector_path = detector_path  # Optional persisted PCA detector
+        self.thread_count = thread_count
+        self.max_queue_depth = max_queue_depth  # 0 means unbounded
+        self.pending = 0  # Submitted but not finished (running + queued)
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.model_version = None
+        self.detector_loaded = False
+        self.started_at = None
+        self._executor = None
+        self._reload_lock = threading.Lock()
+
+    # Build an executor with the model loaded. Blocking: it loads the model (threads) or
+    # starts the workers so each loads its copy (processes) before taking traffic.
+    def _build(self, model_path):
+        # The version covers the PCA detector too, since it changes the scores
+        detector_loaded = bool(self.detector_path) and os.path.exists(self.detector_path)
+        model_version = inference.model_version(model_path)
+        if detector_loaded:
+            model_version += "-" + inference.model_version(self.detector_path)
+        state = None
+        if self.kind == "thread":
+            # Loaded once in this process; every thread scores with the same model
+            state = inference.load_worker_state(model_path, self.thread_count, self.detector_path)
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        else:
+            # Spawned workers import inference.py only, not the web app
+            executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=inference.init_worker,
+                initargs=(model_path, self.thread_count, self.detector_path)
+            )
+            for future in [executor.submit(os.getpid) for _ in range(self.max_workers)]:
+                future.result()
+        return executor, state, model_version, detector_loaded
+
+    # Switch new requests to a built executor in one step; returns the previous one
+    def _install(self, model_path, executor, state, model_version, detector_loaded):
+        if state is not None:
+            inference.set_worker_state(*state)
+        previous, self._executor = self._executor, executor
+        self.model_path = model_path
+        self.model_version = model_version
+        self.detector_loaded = detector_loaded
+        return previous
+
+    def start(self):
+        self._install(self.model_path, *self._build(self.model_path))
+        self.started_at = time.monotonic()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    # Load the new model into a fresh executor while the current one keeps serving, swap
+    # it in, then let the old executor finish the work already handed to it. Blocking,
+    # so the app runs it off the event loop.
+    def reload(self, model_path=None):
+        with self._reload_lock:
+            model_path = model_path or self.model_path
+            previous = self._install(model_path, *self._build(model_path))
+        if previous is not None:
+            previous.shutdown(wait=True, cancel_futures=False)
+
+    async def run(self, fn, *args):
+        if self._executor is None:
+            raise RuntimeError("Inference pool is not running")
+        if self.max_queue_depth and self.queue_depth() >= self.max_queue_depth:
+            self.rejected += 1
+            raise PoolSaturatedError(f"Inference queue is full ({self.queue_depth()} waiting)")
+
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+    def in_flight(self):
+        return min(self.pending, self.max_workers)
+
+    def queue_depth(self):
+        return max(0, self.pending - self.max_workers)
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "model_version": self.model_version,
+            "pca_detector": self.detector_path if self.detector_loaded else None,
+            "in_flight": self.in_flight(),
+            "queue_depth": self.queue_depth(),
+            "saturation": self.in_flight() / self.max_workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "uptime_seconds": time.monotonic() - self.started_at if self.started_at else 0.0
+        }
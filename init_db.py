@@ -1,23 +1,55 @@
-import sqlite3
-
-conn = sqlite3.connect("logs.db")
-cursor = conn.cursor()
-
-cursor.execute("""
-    CREATE TABLE IF NOT EXISTS logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT,
-        source_ip TEXT,
-        destination_ip TEXT,
-        protocol TEXT,
-        anomaly_score REAL,
-        predicted_traffic_type TEXT,
-        risk_flag TEXT,
-        confidence_score REAL,  -- Add this column
-        log_id TEXT UNIQUE
-    )
-""")
-
-conn.commit()
-conn.close()
+import sqlite3
+from log_store import ROLLUP_TABLES, has_rollup_tables, update_rollups
+
+conn = sqlite3.connect("logs.db")
+cursor = conn.cursor()
+
+cursor.execute("""
+    CREATE TABLE IF NOT EXISTS logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        source_ip TEXT,
+        destination_ip TEXT,
+        protocol TEXT,
+        anomaly_score REAL,
+        predicted_traffic_type TEXT,
+        risk_flag TEXT,
+        confidence_score REAL,  -- Add this column
+        log_id TEXT UNIQUE
+    )
+""")
+
+# Indexes for the dashboard's filters, date ranges and sorting
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_risk_flag ON logs (risk_flag)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_predicted_traffic_type ON logs (predicted_traffic_type)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_protocol ON logs (protocol)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_source_ip ON logs (source_ip)")
+
+# Hourly and daily rollups for the dashboard charts, maintained by the consumer (see log_store.py)
+rollups_existed = has_rollup_tables(conn)
+for table in ROLLUP_TABLES:
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            bucket TEXT NOT NULL,  -- Timestamp prefix: "YYYY-MM-DD HH" hourly, "YYYY-MM-DD" daily
+            risk_flag TEXT NOT NULL,
+            predicted_traffic_type TEXT NOT NULL,
+            protocol TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            anomaly_sum REAL NOT NULL,
+            anomaly_max REAL NOT NULL,
+            PRIMARY KEY (bucket, risk_flag, predicted_traffic_type, protocol)
+        ) WITHOUT ROWID
+    """)
+# Backfill from the logs already stored when the rollups are added to an existing database
+if not rollups_existed:
+    update_rollups(conn, 0)
+
+# Planner statistics, so date-range queries pick the timestamp index over a low-selectivity
+# one; re-run this script on a populated database to add the indexes and refresh them
+cursor.execute("PRAGMA analysis_limit = 1000")
+cursor.execute("ANALYZE logs")
+
+conn.commit()
+conn.close()
 print("Database initialized successfully.")
\ No newline at end of file
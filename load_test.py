@@ -0,0 +1,228 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import requests
+import batch_consumer
+from batch_producer import produce
+from consumer_supervisor import run_worker
+from slack_stub import SlackStub
+from transport import LocalProducerClient
+
+# Target rates (events/s) stepped through until the pipeline saturates
+RATES = "250,500,1000,2000,4000,8000"
+STEP_SECONDS = 20.0  # Produce for this long at each rate
+DRAIN_TIMEOUT = 60.0  # Longest wait for the consumers to catch up after a step
+WARMUP_EVENTS = 200  # Sent (and drained) before the first step, not measured
+# A step is sustained when the consumers kept up with the target rate and latency stayed bounded
+SATURATION_RATIO = 0.9  # Committed events/s must reach this fraction of the target
+MAX_P99_SECONDS = 5.0
+
+# Logs for one step: generated synthetic logs, or the CSV replayed with timestamps moved
+# forward one day per pass (and 1000 days per step) so replayed logs aren't dropped as
+# duplicates; whole days keep the shifted timestamps inside pandas' nanosecond range
+def make_logs(source, n_rows, seed):
+    if source == "generated":
+        from benchmarks.synthetic_logs import generate_logs
+
+        return generate_logs(n_rows, seed=seed).to_dict(orient="records")
+    df = pd.read_csv(source)
+    frames = []
+    for cycle in range(-(-n_rows // len(df))):
+        frame = df.copy()
+        timestamps = pd.to_datetime(frame["Timestamp"]) + pd.Timedelta(days=seed * 1000 + cycle)
+        frame["Timestamp"] = timestamps.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+        frames.append(frame)
+    return pd.concat(frames).iloc[:n_rows].to_dict(orient="records")
+
+def wait_for_api(api_url, api_key, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{api_url}/stats", headers={"x-api-key": api_key}, timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Prediction API at {api_url} did not come up within {timeout}s")
+
+# Collect consumer batch stats until `expected` events have been committed (or the timeout passes)
+def drain(stats_queue, expected, timeout):
+    events = 0
+    latencies = []
+    stages = {}
+    last_commit = None
+    deadline = time.time() + timeout
+    while events < expected and time.time() < deadline:
+        try:
+            stats = stats_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        events += stats["events"]
+        latencies.extend(stats["latencies"])
+        for stage, seconds in stats["stages"].items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+        last_commit = stats["time"]
+    return events, latencies, stages, last_commit
+
+def run_step(producer, stats_queue, logs, rate):
+    start_time = time.time()
+    produce(producer, iter(logs), "round-robin", rate, transport="local")
+    produce_seconds = time.time() - start_time
+    events, latencies, stages, last_commit = drain(stats_queue, len(logs), DRAIN_TIMEOUT)
+    busy = sum(stages.values())
+    elapsed = (last_commit or time.time()) - start_time
+    result = {
+        "target_rate": rate,
+        "produced": len(logs),
+        "committed": events,
+        "drained": events >= len(logs),
+        "produce_seconds": produce_seconds,
+        "produced_rate": len(logs) / produce_seconds,
+        "committed_rate": events / elapsed if elapsed > 0 else 0.0,
+        "latency_p50": float(np.percentile(latencies, 50)) if latencies else None,
+        "latency_p95": float(np.percentile(latencies, 95)) if latencies else None,
+        "latency_p99": float(np.percentile(latencies, 99)) if latencies else None,
+        "latency_max": float(max(latencies)) if latencies else None,
+        # Share of the consumers' busy time per stage of on_event_batch
+        "stage_share": {stage: seconds / busy for stage, seconds in stages.items()} if busy else None
+    }
+    result["sustained"] = (
+        result["drained"]
+        and result["committed_rate"] >= SATURATION_RATIO * rate
+        and result["latency_p99"] is not None and result["latency_p99"] <= MAX_P99_SECONDS
+    )
+    return result
+
+# Replay logs through producer -> local broker -> consumer processes -> prediction API -> logs.db
+# at increasing rates and report throughput, end-to-end latency and the saturation point:
+#   python load_test.py --rates 500,1000,2000 --partitions 2 --output load_test.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline load test")
+    parser.add_argument("--source", default="generated", help="'generated' or a CSV file to replay (e.g. pca_merged_logs.csv)")
+    parser.add_argument("--rates", default=RATES, help="comma-separated target rates in events/s")
+    parser.add_argument("--step-seconds", type=float, default=STEP_SECONDS)
+    parser.add_argument("--partitions", type=int, default=2, help="local hub partitions (one consumer process each)")
+    parser.add_argument("--batch-size", type=int, default=300, help="consumer max_batch_size")
+    parser.add_argument("--inference", choices=["http", "embedded"], default="http")
+    parser.add_argument("--api-url", default=batch_consumer.API_URL)
+    parser.add_argument("--start-api", action="store_true", help="start app.py with uvicorn on the --api-url port")
+    parser.add_argument("--keep-going", action="store_true", help="run every rate even after saturation")
+    parser.add_argument("--workdir", help="directory for the broker and logs.db (default: a temporary one, removed afterwards)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    workdir = args.workdir or tempfile.mkdtemp(prefix="load_test_")
+    os.makedirs(workdir, exist_ok=True)
+    subprocess.run([sys.executable, os.path.join(repo_dir, "init_db.py")], cwd=workdir, check=True)
+    db_path = os.path.join(workdir, "logs.db")
+    broker_path = os.path.join(workdir, "broker")
+
+    api_process = None
+    if args.start_api and args.inference == "http":
+        port = args.api_url.rsplit(":", 1)[-1].strip("/")
+        api_process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--port", port, "--log-level", "warning"], cwd=repo_dir
+        )
+    slack_stub = SlackStub(port=0).start()
+
+    config = {
+        "TRANSPORT": "local",
+        "LOCAL_BROKER": broker_path,
+        "LOCAL_BROKER_PARTITIONS": args.partitions,
+        "STARTING_POSITION": "-1",
+        "DB_PATH": db_path,
+        "CHECKPOINT_STORE": "sqlite",
+        "CHECKPOINT_PATH": db_path,
+        "STATS_PATH": os.path.join(workdir, "consumer_stats.jsonl"),
+        "BATCH_SIZE": args.batch_size,
+        "LOG_EACH_EVENT": False,
+        "INFERENCE_MODE": args.inference,
+        "API_URL": args.api_url,
+        "MODEL_PATH": os.path.join(repo_dir, batch_consumer.MODEL_PATH),
+        "PCA_DETECTOR_PATH": os.path.join(repo_dir, batch_consumer.PCA_DETECTOR_PATH),
+        "SLACK_BASE_URL": slack_stub.base_url
+    }
+    producer = LocalProducerClient(broker_path, batch_consumer.eventhub_name, args.partitions)
+    context = multiprocessing.get_context("spawn")
+    stats_queue = context.Queue()
+    stop_event = context.Event()
+    workers = []
+    steps = []
+    try:
+        if args.inference == "http":
+            wait_for_api(args.api_url, batch_consumer.API_KEY)
+        for partition_id in producer.get_partition_ids():
+            worker = context.Process(target=run_worker, args=(partition_id, stats_queue, stop_event, config))
+            worker.start()
+            workers.append(worker)
+
+        # Warm up: workers load, connect and take their first batches
+        warmup_logs = make_logs(args.source, WARMUP_EVENTS, seed=0)
+        produce(producer, iter(warmup_logs), "round-robin", 0, transport="local")
+        warmed_up, _, _, _ = drain(stats_queue, len(warmup_logs), DRAIN_TIMEOUT * 2)
+        if warmed_up < len(warmup_logs):
+            raise RuntimeError(f"Consumers only committed {warmed_up} of {len(warmup_logs)} warm-up events")
+
+        for step, rate in enumerate(float(value) for value in args.rates.split(",")):
+            logs = make_logs(args.source, int(rate * args.step_seconds), seed=step + 1)
+            result = run_step(producer, stats_queue, logs, rate)
+            steps.append(result)
+            p50, p95, p99 = (f"{result[key]:.3f}s" if result[key] is not None else "n/a"
+                             for key in ("latency_p50", "latency_p95", "latency_p99"))
+            print(
+                f"[LOAD] target {rate:>8,.0f}/s | produced {result['produced_rate']:>8,.0f}/s | "
+                f"committed {result['committed_rate']:>8,.0f}/s | p50 {p50} p95 {p95} p99 {p99} | "
+                f"{'sustained' if result['sustained'] else 'SATURATED'}"
+            )
+            if result["stage_share"]:
+                print("       stages: " + " | ".join(f"{stage} {share:.0%}" for stage, share in result["stage_share"].items()))
+            if not result["sustained"] and not args.keep_going:
+                break
+    except KeyboardInterrupt:
+        print("Load test stopped by user")
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join(30)
+        slack_stub.stop()
+        if api_process is not None:
+            api_process.terminate()
+            api_process.wait(30)
+
+    sustained = [step["target_rate"] for step in steps if step["sustained"]]
+    saturated = [step["target_rate"] for step in steps if not step["sustained"]]
+    results = {
+        "run_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "config": {
+            "source": args.source,
+            "partitions": args.partitions,
+            "batch_size": args.batch_size,
+            "inference": args.inference,
+            "step_seconds": args.step_seconds,
+            "saturation_ratio": SATURATION_RATIO,
+            "max_p99_seconds": MAX_P99_SECONDS
+        },
+        "steps": steps,
+        "max_sustained_rate": max(sustained) if sustained else None,
+        "saturation_rate": min(saturated) if saturated else None
+    }
+    print(f"Max sustained rate: {results['max_sustained_rate']} events/s | saturation at: {results['saturation_rate']} events/s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
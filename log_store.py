@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+
+# Allowed PRAGMA values (PRAGMA arguments can't be bound as parameters)
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+
+# Largest number of bound parameters used in one IN (...) lookup
+MAX_LOOKUP_PARAMS = 500
+
+INSERT_LOG_SQL = """
+    INSERT OR IGNORE INTO logs (timestamp, source_ip, destination_ip, protocol, anomaly_score, predicted_traffic_type, risk_flag, confidence_score, log_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Rollup tables (created by init_db.py) kept up to date with every inserted batch, mapped
+# to the length of the timestamp prefix they bucket by: "YYYY-MM-DD HH" and "YYYY-MM-DD"
+ROLLUP_TABLES = {"log_rollups_hourly": 13, "log_rollups_daily": 10}
+
+# Fold the logs above an id into a rollup table: counts per bucket, risk flag, traffic
+# type and protocol, with the sum and max of anomaly_score
+ROLLUP_SQL = """
+    INSERT INTO {table} (bucket, risk_flag, predicted_traffic_type, protocol, count, anomaly_sum, anomaly_max)
+    SELECT COALESCE(substr(timestamp, 1, {length}), ''), COALESCE(risk_flag, 'Unknown'),
+           COALESCE(predicted_traffic_type, 'Unknown'), COALESCE(protocol, 'Unknown'),
+           COUNT(*), SUM(COALESCE(anomaly_score, 0.0)), MAX(COALESCE(anomaly_score, 0.0))
+    FROM logs WHERE id > ?
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (bucket, risk_flag, predicted_traffic_type, protocol) DO UPDATE SET
+        count = count + excluded.count,
+        anomaly_sum = anomaly_sum + excluded.anomaly_sum,
+        anomaly_max = MAX(anomaly_max, excluded.anomaly_max)
+"""
+
+def has_rollup_tables(conn):
+    placeholders = ",".join("?" * len(ROLLUP_TABLES))
+    found = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})", list(ROLLUP_TABLES)
+    ).fetchone()[0]
+    return found == len(ROLLUP_TABLES)
+
+# Add the logs with id above after_id to every rollup table; run it in the same
+# transaction as the insert so the rollups never disagree with the logs table
+def update_rollups(conn, after_id):
+    for table, length in ROLLUP_TABLES.items():
+        conn.execute(ROLLUP_SQL.format(table=table, length=length), (after_id,))
+
+# SQLite writer for scored logs. A batch is written with one executemany inside one
+# transaction (one fsync per batch rather than per log); the log_id UNIQUE constraint
+# with INSERT OR IGNORE drops duplicates, which are counted from the affected rows.
+# With rollups on, the same transaction folds the new rows into the rollup tables.
+class LogStore:
+    def __init__(self, path="logs.db", synchronous="NORMAL", journal_mode="WAL", busy_timeout=30.0, rollups=True):
+        synchronous = synchronous.upper()
+        journal_mode = journal_mode.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unknown synchronous mode {synchronous!r}, expected one of {SYNCHRONOUS_MODES}")
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal mode {journal_mode!r}, expected one of {JOURNAL_MODES}")
+
+        self.path = path
+        # The Event Hub client calls back from one thread per partition, so the
+        # connection is shared between threads and guarded by a lock
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened and closed explicitly around each batch
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        self.rollups = rollups and has_rollup_tables(self.conn)
+        if rollups and not self.rollups:
+            print(f"[WARN] Rollup tables missing from {path}; run init_db.py to create them. Rollups are off.")
+
+    # Return the subset of log_ids already stored, in a few IN (...) queries per batch
+    def existing_log_ids(self, log_ids):
+        log_ids = list(log_ids)
+        found = set()
+        for start in range(0, len(log_ids), MAX_LOOKUP_PARAMS):
+            chunk = log_ids[start:start + MAX_LOOKUP_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self.conn.execute(f"SELECT log_id FROM logs WHERE log_id IN ({placeholders})", chunk).fetchall()
+            found.update(row[0] for row in rows)
+        return found
+
+    # The newest `limit` (log_id, timestamp) rows, oldest first, plus the latest timestamp
+    # among the older rows that were left out (None when the whole table was returned)
+    def recent_log_ids(self, limit):
+        with self._lock:
+            rows = self.conn.execute("SELECT id, log_id, timestamp FROM logs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            if not rows:
+                return [], None
+            latest_older, older_count = self.conn.execute(
+                "SELECT MAX(timestamp), COUNT(*) FROM logs WHERE id < ?", (rows[-1][0],)
+            ).fetchone()
+        covered_after = None
+        if older_count:
+            covered_after = latest_older if latest_older is not None else ""
+        return [(log_id, timestamp) for _, log_id, timestamp in reversed(rows)], covered_after
+
+    # Insert rows (tuples in INSERT_LOG_SQL column order) in one transaction.
+    # Returns (inserted, duplicates).
+    def insert_batch(self, rows):
+        if not rows:
+            return 0, 0
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.rollups:
+                    # Ignored duplicates get no id, so the rows above this are exactly the new ones
+                    previous_max_id = self.conn.execute("SELECT MAX(id) FROM logs").fetchone()[0] or 0
+                changes_before = self.conn.total_changes
+                self.conn.executemany(INSERT_LOG_SQL, rows)
+                inserted = self.conn.total_changes - changes_before
+                if self.rollups and inserted:
+                    update_rollups(self.conn, previous_max_id)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return inserted, len(rows) - inserted
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
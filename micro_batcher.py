@@ -0,0 +1,122 @@
+import asyncio
+
+# Queues concurrent single-row requests and scores them as one batch.
+# A batch is flushed when it reaches max_batch_size or when the oldest
+# queued request has waited max_wait_ms, whichever comes first.
+class MicroBatcher:
+    def __init__(self, score_batch, max_batch_size=64, max_wait_ms=5.0):
+        self.score_batch = score_batch  # Takes a list of items, returns a list of results in the same order
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches_flushed = 0
+        self.items_flushed = 0
+        self._queue = None
+        self._task = None
+        self._dispatched = set()  # Batches handed to an async scorer and not finished yet
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._dispatched:
+            await asyncio.gather(*self._dispatched, return_exceptions=True)
+        # Fail anything still waiting so callers don't hang on shutdown
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    # Queue one item and wait for its own result
+    async def submit(self, item):
+        if self._task is None:
+            raise RuntimeError("Micro-batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches_in_flight": len(self._dispatched),
+            "batches_flushed": self.batches_flushed,
+            "items_flushed": self.items_flushed,
+            "mean_batch_size": self.items_flushed / self.batches_flushed if self.batches_flushed else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
+
+    # Fill `batch` in place, so items already taken off the queue are still reachable if
+    # the task is cancelled while waiting for more
+    async def _collect(self, batch):
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take everything already queued before waiting on the clock
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        while True:
+            batch = []
+            try:
+                await self._collect(batch)
+            except asyncio.CancelledError:
+                # Stopped mid-collection: fail the items taken so far, as stop() does for the queue
+                self._fail(batch, RuntimeError("Micro-batcher stopped"))
+                raise
+            # Callers that gave up (e.g. client disconnect) don't need scoring
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            try:
+                results = self.score_batch(items)
+            except Exception as e:
+                self._fail(batch, e)
+                continue
+
+            if asyncio.iscoroutine(results):
+                # Let the batch finish on its own so the next one can be collected meanwhile
+                task = asyncio.create_task(self._resolve(batch, results))
+                self._dispatched.add(task)
+                task.add_done_callback(self._dispatched.discard)
+            else:
+                self._deliver(batch, results)
+
+    async def _resolve(self, batch, pending_results):
+        try:
+            results = await pending_results
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        self._deliver(batch, results)
+
+    def _deliver(self, batch, results):
+        self.batches_flushed += 1
+        self.items_flushed += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _fail(self, batch, error):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
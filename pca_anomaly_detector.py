@@ -1,40 +1,322 @@
-
-import pandas as pd
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.decomposition import PCA
-import numpy as np
-
-def pca_anomaly_detector(df, numerical_features, categorical_features, variance_retained=0.95, anomaly_percentile=95):
-    df = df.copy()
-
-    # Encode categorical features
-    for col in categorical_features:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col].astype(str))
-
-    # Combine all features for PCA
-    all_features = numerical_features + categorical_features
-    X = df[all_features]
-
-    # Standardize the data
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    # Apply PCA
-    pca = PCA(n_components=variance_retained)
-    X_pca = pca.fit_transform(X_scaled)
-
-    # Reconstruct the data
-    X_reconstructed = pca.inverse_transform(X_pca)
-
-    # Calculate reconstruction error
-    reconstruction_error = np.mean((X_scaled - X_reconstructed) ** 2, axis=1)
-
-    # Determine anomaly threshold
-    threshold = np.percentile(reconstruction_error, anomaly_percentile)
-
-    # Add results to the DataFrame
-    df['pca_anomaly_score'] = reconstruction_error
-    df['pca_anomaly_flag'] = (reconstruction_error > threshold).astype(int)
-
-    return df[['pca_anomaly_score', 'pca_anomaly_flag'] + all_features]
+import argparse
+import joblib
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.decomposition import PCA, IncrementalPCA
+import numpy as np
+from quantile_sketch import TDigest
+
+# Default location of the persisted detector artifact
+DETECTOR_PATH = "pca_detector.joblib"
+
+# Rows per chunk for the out-of-core training and scoring passes
+CHUNK_SIZE = 100000
+
+# Features the detector is trained on by default (the model inputs other than the score itself)
+NUMERICAL_FEATURES = ["Packet_Length", "Packet_Count", "Flow_Duration", "Payload_Entropy"]
+CATEGORICAL_FEATURES = [
+    "Protocol", "Packet_Type", "Device_Information", "Network_Segment",
+    "Geo_location_Data", "Proxy_Information", "Log_Source"
+]
+
+# Rows per block when computing reconstruction errors, so temporaries stay block-sized
+ERROR_BLOCK_SIZE = 65536
+
+# PCA solvers: "auto", "full" and "covariance_eigh" select components by variance directly;
+# "randomized" and "arpack" (truncated SVD) compute a fixed number of components, which is
+# then cut down to the requested variance
+SVD_SOLVERS = ("auto", "full", "covariance_eigh", "randomized", "arpack")
+
+# A fitted PCA anomaly detector: category encodings, scaler, PCA components and the
+# flag threshold. Fit once offline, save it, and load it wherever scores are needed.
+class PCAAnomalyDetector:
+    dtype = np.float64  # Compute dtype; float32 halves the memory of the feature matrix
+
+    def __init__(self, numerical_features, categorical_features, categories, scaler, pca, threshold, anomaly_percentile,
+                 dtype=np.float64):
+        self.numerical_features = list(numerical_features)
+        self.categorical_features = list(categorical_features)
+        self.categories = categories  # column -> sorted class labels, as LabelEncoder.classes_
+        self.scaler = scaler
+        self.pca = pca
+        self.threshold = threshold
+        self.anomaly_percentile = anomaly_percentile
+        self.dtype = np.dtype(dtype).type
+
+    @property
+    def all_features(self):
+        return self.numerical_features + self.categorical_features
+
+    # Fitted integer codes for one categorical column (labels not seen during fitting get -1
+    # instead of failing the batch). Category-typed columns are mapped per category, not per row.
+    def category_codes(self, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            lookup = pd.Categorical(series.cat.categories.astype(str), categories=self.categories[series.name]).codes
+            codes = series.cat.codes.to_numpy()
+            return np.where(codes >= 0, lookup[codes], -1)
+        return pd.Categorical(series.astype(str), categories=self.categories[series.name]).codes
+
+    # Build the raw feature matrix in the detector's compute dtype
+    def encode(self, df):
+        X = np.empty((len(df), len(self.all_features)), dtype=self.dtype)
+        for i, col in enumerate(self.numerical_features):
+            X[:, i] = df[col].to_numpy()
+        offset = len(self.numerical_features)
+        for i, col in enumerate(self.categorical_features):
+            X[:, offset + i] = self.category_codes(df[col])
+        return X
+
+    # Mean squared reconstruction error of standardized rows. Worked through in blocks,
+    # so only block-sized projections and residuals exist at any time, never full-size
+    # X_pca / X_reconstructed matrices.
+    def reconstruction_error(self, X_scaled, block_size=ERROR_BLOCK_SIZE):
+        components = self.pca.components_.astype(X_scaled.dtype, copy=False)
+        mean = self.pca.mean_.astype(X_scaled.dtype, copy=False)
+        errors = np.empty(len(X_scaled), dtype=X_scaled.dtype)
+        for start in range(0, len(X_scaled), block_size):
+            block = X_scaled[start:start + block_size] - mean
+            block -= (block @ components.T) @ components
+            errors[start:start + block_size] = np.einsum("ij,ij->i", block, block) / X_scaled.shape[1]
+        return errors
+
+    # Vectorized scoring of a batch of raw rows; standardization happens in place
+    def score(self, df):
+        return self.reconstruction_error(self.scaler.transform(self.encode(df), copy=False))
+
+    def flag(self, reconstruction_error):
+        return (reconstruction_error > self.threshold).astype(int)
+
+    def save(self, path=DETECTOR_PATH):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=DETECTOR_PATH):
+        detector = joblib.load(path)
+        if not isinstance(detector, PCAAnomalyDetector):
+            raise TypeError(f"{path} does not contain a PCAAnomalyDetector")
+        return detector
+
+# Keep the smallest number of components that explains variance_retained, the same
+# way PCA(n_components=<float>) chooses them
+def _truncate_components(pca, variance_retained):
+    n_components = int(np.searchsorted(np.cumsum(pca.explained_variance_ratio_), variance_retained, side="right") + 1)
+    n_components = min(n_components, len(pca.components_))
+    pca.components_ = pca.components_[:n_components]
+    pca.explained_variance_ = pca.explained_variance_[:n_components]
+    pca.explained_variance_ratio_ = pca.explained_variance_ratio_[:n_components]
+    pca.singular_values_ = pca.singular_values_[:n_components]
+    pca.n_components_ = pca.n_components = n_components
+    return pca
+
+# Fit PCA with the chosen solver. An integer variance_retained is taken as a component count.
+def _fit_pca(X_scaled, variance_retained, svd_solver):
+    if svd_solver not in SVD_SOLVERS:
+        raise ValueError(f"Unknown svd_solver {svd_solver!r}, expected one of {SVD_SOLVERS}")
+    fixed_count = isinstance(variance_retained, (int, np.integer)) and variance_retained >= 1
+    if fixed_count or svd_solver in ("auto", "full", "covariance_eigh"):
+        return PCA(n_components=variance_retained, svd_solver=svd_solver).fit(X_scaled)
+
+    # arpack can compute at most n_features - 1 components
+    n_features = X_scaled.shape[1]
+    n_components = n_features - 1 if svd_solver == "arpack" else n_features
+    pca = PCA(n_components=n_components, svd_solver=svd_solver, random_state=0).fit(X_scaled)
+    return _truncate_components(pca, variance_retained)
+
+# Fit the encoders, scaler and PCA on a DataFrame and return the fitted detector
+# together with the reconstruction error of every training row
+def fit_pca_detector(df, numerical_features, categorical_features, variance_retained=0.95, anomaly_percentile=95,
+                     svd_solver="auto", dtype=np.float64):
+    # Learn the categorical encodings: sorted distinct labels, i.e. LabelEncoder.classes_,
+    # found by hashing first so only the distinct values get sorted
+    categories = {}
+    for col in categorical_features:
+        values = df[col].cat.categories[np.unique(df[col].cat.codes[df[col].cat.codes >= 0])] \
+            if isinstance(df[col].dtype, pd.CategoricalDtype) else pd.unique(df[col])
+        categories[col] = np.sort(pd.Index(values).astype(str).unique().to_numpy(dtype=object))
+
+    detector = PCAAnomalyDetector(
+        numerical_features, categorical_features, categories, StandardScaler(), None, None, anomaly_percentile, dtype
+    )
+
+    # Encode and standardize the data (one feature matrix, scaled in place)
+    X = detector.encode(df)
+    X_scaled = detector.scaler.fit(X).transform(X, copy=False)
+
+    # Apply PCA
+    detector.pca = _fit_pca(X_scaled, variance_retained, svd_solver)
+
+    # Calculate reconstruction error
+    reconstruction_error = detector.reconstruction_error(X_scaled)
+
+    # Determine anomaly threshold
+    detector.threshold = float(np.percentile(reconstruction_error, anomaly_percentile))
+
+    return detector, reconstruction_error
+
+def pca_anomaly_detector(df, numerical_features, categorical_features, variance_retained=0.95, anomaly_percentile=95,
+                         svd_solver="auto", dtype=np.float64):
+    detector, reconstruction_error = fit_pca_detector(
+        df, numerical_features, categorical_features, variance_retained, anomaly_percentile, svd_solver, dtype
+    )
+
+    # Results plus the encoded features, without copying the rest of the input frame
+    result = pd.DataFrame({
+        'pca_anomaly_score': reconstruction_error,
+        'pca_anomaly_flag': detector.flag(reconstruction_error)
+    }, index=df.index)
+    for col in numerical_features:
+        result[col] = df[col]
+    for col in categorical_features:
+        result[col] = detector.category_codes(df[col]).astype(np.int64)
+
+    return result
+
+# Stream a CSV or Parquet source as DataFrame chunks of at most chunksize rows
+def iter_chunks(source, columns=None, chunksize=CHUNK_SIZE):
+    if str(source).endswith(".parquet"):
+        import pyarrow.parquet as pq  # Only needed for Parquet sources
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
+
+# Standardization statistics for label-encoded columns, from their value counts alone:
+# codes are ranks in the sorted labels, exactly as LabelEncoder assigns them
+def _categorical_stats(counts):
+    categories = np.array(sorted(counts.index))
+    weights = counts.reindex(categories).to_numpy(dtype=float)
+    codes = np.arange(len(categories), dtype=float)
+    mean = np.average(codes, weights=weights)
+    var = np.average((codes - mean) ** 2, weights=weights)
+    return categories, mean, var
+
+# Out-of-core version of fit_pca_detector. Memory is bounded by chunksize, not by
+# the size of the source:
+#   1. one pass collects category counts and numerical scaler statistics,
+#   2. one pass feeds standardized chunks to IncrementalPCA,
+#   3. one pass computes training reconstruction errors for the flag threshold.
+# IncrementalPCA keeps every component; the variance_retained cut is applied afterwards,
+# the same way PCA(n_components=<float>) chooses its components.
+def fit_pca_detector_streaming(source, numerical_features, categorical_features,
+                               variance_retained=0.95, anomaly_percentile=95, chunksize=CHUNK_SIZE, dtype=np.float64):
+    all_features = numerical_features + categorical_features
+
+    # Pass 1: category counts and numerical mean/variance
+    counts = {col: pd.Series(dtype=float) for col in categorical_features}
+    numerical_scaler = StandardScaler()
+    n_rows = 0
+    for chunk in iter_chunks(source, all_features, chunksize):
+        n_rows += len(chunk)
+        numerical_scaler.partial_fit(chunk[numerical_features].to_numpy(dtype=float))
+        for col in categorical_features:
+            counts[col] = counts[col].add(chunk[col].astype(str).value_counts(), fill_value=0)
+    if n_rows == 0:
+        raise ValueError(f"No rows found in {source}")
+
+    categories = {}
+    means = list(numerical_scaler.mean_)
+    variances = list(numerical_scaler.var_)
+    for col in categorical_features:
+        categories[col], mean, var = _categorical_stats(counts[col])
+        means.append(mean)
+        variances.append(var)
+
+    # Assemble the StandardScaler the in-memory fit would have produced
+    scaler = StandardScaler()
+    scaler.mean_ = np.array(means)
+    scaler.var_ = np.array(variances)
+    scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+    scaler.n_samples_seen_ = n_rows
+    scaler.n_features_in_ = len(all_features)
+
+    detector = PCAAnomalyDetector(
+        numerical_features, categorical_features, categories, scaler, None, None, anomaly_percentile, dtype
+    )
+
+    # Pass 2: incremental PCA on standardized chunks. partial_fit needs at least as many
+    # rows as features, so a chunk shorter than that is carried over into the next one
+    # (a short remainder at the very end is left out of the fit).
+    pca = IncrementalPCA()
+    carry = None
+    for chunk in iter_chunks(source, all_features, chunksize):
+        X_scaled = scaler.transform(detector.encode(chunk), copy=False)
+        if carry is not None:
+            X_scaled = np.vstack([carry, X_scaled])
+            carry = None
+        if len(X_scaled) < len(all_features):
+            carry = X_scaled
+            continue
+        pca.partial_fit(X_scaled)
+    if not hasattr(pca, "components_"):
+        raise ValueError(f"Need at least {len(all_features)} rows to fit the PCA detector")
+
+    detector.pca = _truncate_components(pca, variance_retained)
+
+    # Pass 3: training errors for the threshold, summarised by a t-digest so memory
+    # stays constant however many rows there are
+    digest = TDigest()
+    for chunk in iter_chunks(source, all_features, chunksize):
+        digest.update(detector.score(chunk))
+    detector.threshold = digest.percentile(anomaly_percentile)
+    return detector
+
+# Score a CSV or Parquet source chunk by chunk and write every input column plus
+# pca_anomaly_score and pca_anomaly_flag (the pca_merged_logs.csv layout)
+def score_pca_stream(detector, source, output_path, chunksize=CHUNK_SIZE):
+    writer = None
+    rows = 0
+    try:
+        for i, chunk in enumerate(iter_chunks(source, None, chunksize)):
+            reconstruction_error = detector.score(chunk)
+            chunk["pca_anomaly_score"] = reconstruction_error
+            chunk["pca_anomaly_flag"] = detector.flag(reconstruction_error)
+            if str(output_path).endswith(".parquet"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(output_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+# Fit a detector on raw logs and persist it for the API:
+#   python pca_anomaly_detector.py cyber_threat_logs.csv [pca_detector.joblib]
+# Large CSV or Parquet sources can be trained and scored out of core:
+#   python pca_anomaly_detector.py flows.parquet --streaming --score-output pca_merged_logs.csv
+if __name__ == "__main__":
+    # Go through the module name so the pickled class loads outside this script
+    import pca_anomaly_detector
+
+    parser = argparse.ArgumentParser(description="Fit and persist the PCA anomaly detector")
+    parser.add_argument("source", nargs="?", default="cyber_threat_logs.csv")
+    parser.add_argument("output", nargs="?", default=DETECTOR_PATH)
+    parser.add_argument("--streaming", action="store_true", help="train in chunks instead of loading the whole source")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--score-output", help="also write scored rows to this CSV or Parquet file")
+    parser.add_argument("--svd-solver", default="auto", choices=SVD_SOLVERS, help="PCA solver for in-memory training")
+    parser.add_argument("--float32", action="store_true", help="compute in float32 instead of float64")
+    args = parser.parse_args()
+
+    dtype = np.float32 if args.float32 else np.float64
+    if args.streaming:
+        detector = pca_anomaly_detector.fit_pca_detector_streaming(
+            args.source, NUMERICAL_FEATURES, CATEGORICAL_FEATURES, chunksize=args.chunksize, dtype=dtype
+        )
+    else:
+        detector, _ = pca_anomaly_detector.fit_pca_detector(
+            pd.read_csv(args.source), NUMERICAL_FEATURES, CATEGORICAL_FEATURES, svd_solver=args.svd_solver, dtype=dtype
+        )
+    detector.save(args.output)
+    print(f"Saved PCA detector ({detector.pca.n_components_} components, threshold {detector.threshold:.6f}) to {args.output}")
+
+    if args.score_output:
+        rows = pca_anomaly_detector.score_pca_stream(detector, args.source, args.score_output, args.chunksize)
+        print(f"Scored {rows} logs to {args.score_output}")
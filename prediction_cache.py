@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# Bounded LRU + TTL cache of prediction results, keyed on a canonical hash of the
+# model features. Entries belong to one model version; changing the version
+# flushes the cache so a new model never serves an old model's answers.
+class PredictionCache:
+    def __init__(self, features, max_entries=100000, ttl_seconds=300.0, model_version=None):
+        self.features = list(features)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+
+    # Canonical key: values in feature order, numbers normalised through float()
+    # so 1 and 1.0 hash the same, hashed down to a fixed 16 bytes
+    def key(self, log):
+        get = log.get if isinstance(log, dict) else lambda name: getattr(log, name)
+        parts = []
+        for feature in self.features:
+            value = get(feature)
+            parts.append(repr(float(value)) if isinstance(value, (int, float)) else str(value))
+        return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Flush everything when the model behind the cache changes
+    def set_model_version(self, model_version):
+        if model_version != self.model_version:
+            self.clear()
+            self.model_version = model_version
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_version": self.model_version
+        }
@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Statuses for a request the service rejected (validation, oversized batch): retrying the
+# same logs can't succeed, so those logs are returned as None
+REJECTED_STATUSES = (400, 413, 422)
+
+# Raised when scoring failed for a reason unrelated to the logs (connection error, 5xx,
+# 429, authentication) once retries are used up. The consumer then leaves the batch
+# unprocessed so it is redelivered, instead of storing the logs unscored.
+class PredictionUnavailableError(RuntimeError):
+    pass
+
+# HTTP client for the prediction API. One pooled keep-alive session is shared by
+# up to max_in_flight concurrent calls; failed calls are retried with exponential
+# backoff. When the service has /predict_batch the whole batch goes in one request,
+# otherwise single /predict calls are fanned out over the pool.
+class PredictionClient:
+    def __init__(self, base_url="http://localhost:8001", api_key="streaminglogfastapi", max_in_flight=8,
+                 timeout=10.0, connect_timeout=3.0, retries=3, backoff_factor=0.2,
+                 use_batch_endpoint=True, max_batch_size=5000):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"x-api-key": api_key}
+        self.timeout = (connect_timeout, timeout)
+        self.max_in_flight = max_in_flight
+        self.use_batch_endpoint = use_batch_endpoint
+        self.max_batch_size = max_batch_size
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"POST"}),  # Scoring has no side effects, so POSTs are safe to retry
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="predict")
+
+    # Score one log; returns the prediction dict, or None if the service rejected the log
+    def predict_one(self, log):
+        try:
+            response = self.session.post(f"{self.base_url}/predict", json=log, headers=self.headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise PredictionUnavailableError(f"API request failed: {str(e)}") from e
+        if response.status_code in REJECTED_STATUSES:
+            print(f"[ERROR] API rejected log {log.get('log_id')} with status {response.status_code}: {response.text}")
+            return None
+        if response.status_code != 200:
+            raise PredictionUnavailableError(f"API request failed with status {response.status_code}: {response.text}")
+        return response.json()
+
+    # Score a chunk through /predict_batch; None marks an endpoint the service doesn't have.
+    # The service validates the whole chunk, so a rejected chunk is split in half and each
+    # half retried, until only the invalid logs are left (as None).
+    def _predict_batch(self, logs):
+        try:
+            response = self.session.post(f"{self.base_url}/predict_batch", json=logs, headers=self.headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise PredictionUnavailableError(f"Batch API request failed: {str(e)}") from e
+        if response.status_code in (404, 405):
+            return None
+        if response.status_code in REJECTED_STATUSES:
+            if len(logs) == 1:
+                print(f"[ERROR] Batch API rejected log {logs[0].get('log_id')} with status {response.status_code}: {response.text}")
+                return [None]
+            middle = len(logs) // 2
+            return self._predict_batch(logs[:middle]) + self._predict_batch(logs[middle:])
+        if response.status_code != 200:
+            raise PredictionUnavailableError(f"Batch API request failed with status {response.status_code}: {response.text}")
+        return response.json()
+
+    # Score a list of logs; results line up with the input, None for logs the service
+    # rejected. Raises PredictionUnavailableError when the service couldn't score them.
+    def predict_many(self, logs):
+        if not logs:
+            return []
+        predictions = []
+        if self.use_batch_endpoint:
+            for start in range(0, len(logs), self.max_batch_size):
+                chunk = self._predict_batch(logs[start:start + self.max_batch_size])
+                if chunk is None:
+                    print("[WARN] Prediction service has no /predict_batch, falling back to /predict")
+                    self.use_batch_endpoint = False
+                    break
+                predictions.extend(chunk)
+            else:
+                return predictions
+        return predictions + list(self._executor.map(self.predict_one, logs[len(predictions):]))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+# In-process alternative to PredictionClient for consumers running next to the model:
+# loads the CatBoost model (and the PCA detector when there is one) and scores each batch
+# with one predict_proba call and the same risk rules as the API, with no HTTP in between.
+class EmbeddedPredictor:
+    def __init__(self, model_path=None, detector_path=None, thread_count=-1):
+        import inference  # Deferred so HTTP-only consumers don't need catboost installed
+        self.inference = inference
+        self.model = inference.load_model(model_path or inference.MODEL_PATH)
+        self.detector = inference.load_detector(detector_path or inference.DETECTOR_PATH)
+        self.thread_count = thread_count
+
+    def predict_one(self, log):
+        return self.predict_many([log])[0]
+
+    # Score a list of logs; results line up with the input. If the batch can't be scored,
+    # each log is scored on its own so only the ones that fail come back as None.
+    def predict_many(self, logs):
+        if not logs:
+            return []
+        try:
+            return self._score(logs)
+        except Exception as e:
+            if len(logs) == 1:
+                print(f"[ERROR] Embedded prediction failed for log {logs[0].get('log_id')}: {str(e)}")
+                return [None]
+        return [prediction for log in logs for prediction in self.predict_many([log])]
+
+    def _score(self, logs):
+        import pandas as pd
+        columns = {feature: [log.get(feature) for log in logs] for feature in self.inference.features}
+        df = self.inference.fill_anomaly_scores(self.detector, pd.DataFrame(columns, columns=self.inference.features))
+        return self.inference.score_frame(self.model, df, thread_count=self.thread_count)
+
+    def close(self):
+        pass
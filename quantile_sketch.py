@@ -0,0 +1,177 @@
+import math
+import numpy as np
+
+# Mergeable streaming quantile estimator (a merging t-digest). Values are summarised
+# by at most ~compression weighted centroids that are small near the tails and larger
+# in the middle, so extreme percentiles like the 95th/99th stay accurate in constant
+# memory. Digests built on different workers can be merged into one.
+class TDigest:
+    def __init__(self, compression=200, buffer_size=None):
+        self.compression = compression
+        self.buffer_size = buffer_size or 10 * compression
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer = []  # (values, weight) batches not merged into centroids yet
+        self._buffered = 0
+        self._decay = 1.0  # Decay not applied to the weights yet, folded in by _compress
+
+    # Add a batch of values (NaN/inf are ignored)
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        # Stored relative to the pending decay so decay() never has to touch the buffer
+        self._buffer.append((values, 1.0 / self._decay))
+        self._buffered += len(values)
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    # Fold another digest (e.g. from another worker) into this one
+    def merge(self, other):
+        other._compress()
+        if not other.count:
+            return self
+        self._compress()
+        self._means = np.concatenate([self._means, other._means])
+        self._weights = np.concatenate([self._weights, other._weights])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(force=True)
+        return self
+
+    # Scale every weight down so older values count for less than newer ones. Only the
+    # count is updated now; the factor is applied to the weights at the next compression,
+    # so decaying on every batch doesn't defeat the buffering. Once weights have decayed,
+    # min/max are reset to the centroid range at each compression, so an old extreme
+    # doesn't pin the tails after its weight has faded.
+    def decay(self, factor):
+        self.count *= factor
+        self._decay *= factor
+        if self._decay < 1e-100:  # Fold it in before 1 / decay overflows
+            self._compress(force=True)
+
+    def quantile(self, q):
+        self._compress()
+        if not self.count:
+            return math.nan
+        if len(self._means) == 1:
+            return float(self._means[0])
+        # Each centroid sits at the middle of its weight; the ends are the exact min/max
+        centers = np.cumsum(self._weights) - self._weights / 2
+        positions = np.concatenate([[0.0], centers, [self.count]])
+        values = np.concatenate([[self.min], self._means, [self.max]])
+        return float(np.interp(q * self.count, positions, values))
+
+    # Number of centroids currently held
+    def size(self):
+        self._compress()
+        return len(self._means)
+
+    def percentile(self, p):
+        return self.quantile(p / 100.0)
+
+    # Plain-data form, for shipping a digest between processes
+    def to_dict(self):
+        self._compress()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "means": self._means.tolist(),
+            "weights": self._weights.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(compression=data["compression"])
+        digest.count = data["count"]
+        digest.min = data["min"]
+        digest.max = data["max"]
+        digest._means = np.asarray(data["means"], dtype=float)
+        digest._weights = np.asarray(data["weights"], dtype=float)
+        return digest
+
+    # Merge buffered values and existing centroids into a new centroid set. Centroids are
+    # grouped by the k1 scale function k(q) = compression / (2 pi) * asin(2q - 1), so each
+    # group covers at most one unit of k and tail groups stay small.
+    def _compress(self, force=False):
+        decay, self._decay = self._decay, 1.0
+        if not self._buffered and not force:
+            if decay != 1.0:
+                self._weights = self._weights * decay
+            return
+        means = np.concatenate([self._means] + [values for values, _ in self._buffer])
+        weights = np.concatenate([self._weights * decay] + [np.full(len(values), weight * decay) for values, weight in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+        if not len(means):
+            return
+
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = np.floor(self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)))
+        starts = np.flatnonzero(np.concatenate([[True], k[1:] != k[:-1]]))
+
+        group_weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(means * weights, starts) / group_weights
+        self._weights = group_weights
+        if decay != 1.0:
+            self.min, self.max = float(self._means[0]), float(self._means[-1])
+
+# Percentile threshold over a live stream of anomaly scores. Weights decay with a
+# half-life measured in observations, so the threshold follows drift instead of being
+# pinned by old traffic. Until min_count scores have been seen, the initial threshold
+# (e.g. the one fitted offline with the PCA detector) is used, or nothing is flagged
+# when there isn't one.
+class RollingQuantileThreshold:
+    def __init__(self, percentile=95, compression=200, half_life=100000, min_count=1000, initial=None):
+        self.percentile = percentile
+        self.half_life = half_life  # None or 0 keeps every observation at full weight
+        self.min_count = min_count
+        self.initial = initial
+        self.digest = TDigest(compression=compression)
+
+    # Decays once per batch; the digest applies it lazily, at its next compression
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        if self.half_life and len(values):
+            self.digest.decay(0.5 ** (len(values) / self.half_life))
+        self.digest.update(values)
+
+    def merge(self, other):
+        self.digest.merge(other.digest)
+        return self
+
+    def threshold(self):
+        if self.digest.count < self.min_count or not self.digest.count:
+            return self.initial
+        return self.digest.percentile(self.percentile)
+
+    # Flag values against the current threshold (all 0 until there is one)
+    def flag(self, values):
+        threshold = self.threshold()
+        values = np.asarray(values, dtype=float)
+        if threshold is None:
+            return np.zeros(values.shape, dtype=int)
+        return (values > threshold).astype(int)
+
+    def stats(self):
+        return {
+            "percentile": self.percentile,
+            "threshold": self.threshold(),
+            "effective_count": self.digest.count,
+            "centroids": self.digest.size(),
+            "half_life": self.half_life
+        }
@@ -0,0 +1,82 @@
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Local stand-in for the Slack Web API's chat.postMessage, for exercising alerting without
+# a workspace. Point a client at it with WebClient(token="x", base_url="http://localhost:8089/api/").
+# fail_first makes the first N calls return HTTP 500, to exercise retries.
+class SlackStub:
+    def __init__(self, host="localhost", port=8089, fail_first=0, verbose=False):
+        self.messages = []
+        self.calls = 0
+        self.fail_first = fail_first
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.base_url = f"http://{host}:{self.server.server_address[1]}/api/"
+        self._thread = None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(body or "{}")
+                else:
+                    params = {key: values[0] for key, values in parse_qs(body).items()}
+
+                with stub._lock:
+                    stub.calls += 1
+                    failing = stub.calls <= stub.fail_first
+                    if self.path.rstrip("/") == "/api/chat.postMessage" and not failing:
+                        stub.messages.append(params)
+                if failing:
+                    self._reply(500, {"ok": False, "error": "internal_error"})
+                elif self.path.rstrip("/") != "/api/chat.postMessage":
+                    self._reply(404, {"ok": False, "error": "unknown_method"})
+                else:
+                    if stub.verbose:
+                        print(f"[{params.get('channel')}] {params.get('text')}\n")
+                    self._reply(200, {"ok": True, "channel": params.get("channel"), "ts": f"{len(stub.messages)}.000"})
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="slack-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+# Run standalone and print every message received:
+#   python slack_stub.py --port 8089
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Slack chat.postMessage stub")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fail-first", type=int, default=0, help="answer the first N calls with HTTP 500")
+    args = parser.parse_args()
+
+    stub = SlackStub(args.host, args.port, fail_first=args.fail_first, verbose=True)
+    print(f"Slack stub listening on {stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,440 @@
+import datetime
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends aren't locked, so use one producer per partition
+    fcntl = None
+
+# Local broker configuration
+LOCAL_BROKER_PATH = "local_broker"
+LOCAL_PARTITIONS = 4
+LOCAL_MAX_BATCH_BYTES = 1048576  # Same limit as a standard-tier Event Hub batch
+LOCAL_POLL_INTERVAL = 0.05  # seconds between checks for new events
+LOCAL_READ_CHUNK = 1 << 20
+
+# Record header: body length, properties length, sequence number, enqueued time (epoch seconds)
+RECORD_HEADER = struct.Struct("<IIqd")
+# Partition tail file: sequence number and offset of the last record appended
+TAIL = struct.Struct("<qq")
+
+def _utc(epoch_seconds):
+    return datetime.datetime.fromtimestamp(epoch_seconds, tz=datetime.timezone.utc)
+
+def _json_value(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+# Event read back from the local broker, with the EventData attributes the consumer uses
+class LocalEvent:
+    def __init__(self, body, properties, sequence_number, offset, enqueued_time, partition_key=None):
+        self._body = body
+        self.properties = properties
+        self.sequence_number = sequence_number
+        self.offset = offset
+        self.enqueued_time = _utc(enqueued_time)
+        self.partition_key = partition_key
+
+    @property
+    def body(self):
+        return self._body
+
+    def body_as_str(self, encoding="UTF-8"):
+        return self._body.decode(encoding)
+
+    def body_as_json(self, encoding="UTF-8"):
+        return json.loads(self.body_as_str(encoding))
+
+# Event to send to the local broker, with the EventData attributes LocalEventBatch reads
+class LocalEventData:
+    def __init__(self, body, properties=None):
+        self._body = body if isinstance(body, bytes) else str(body).encode("utf-8")
+        self.properties = properties
+
+    # Body sections, like EventData.body
+    @property
+    def body(self):
+        return iter([self._body])
+
+# Batch with the EventDataBatch interface: add() raises ValueError once max_size_in_bytes is reached
+class LocalEventBatch:
+    def __init__(self, max_size_in_bytes=None, partition_id=None, partition_key=None):
+        self.max_size_in_bytes = max_size_in_bytes or LOCAL_MAX_BATCH_BYTES
+        self.partition_id = partition_id
+        self.partition_key = partition_key
+        self.size_in_bytes = 0
+        self.records = []  # (body bytes, properties JSON bytes)
+
+    def add(self, event_data):
+        body = b"".join(event_data.body)
+        properties = json.dumps({str(_json_value(key)): _json_value(value) for key, value in (event_data.properties or {}).items()}).encode("utf-8")
+        size = RECORD_HEADER.size + len(body) + len(properties)
+        if self.size_in_bytes + size > self.max_size_in_bytes:
+            raise ValueError(f"EventDataBatch has reached its size limit: {self.max_size_in_bytes}")
+        self.records.append((body, properties))
+        self.size_in_bytes += size
+
+    def __len__(self):
+        return len(self.records)
+
+# An Event Hub stand-in on the local disk: one append-only file per partition under
+# <root>/<eventhub_name>/. Offsets are byte positions in the partition file and sequence
+# numbers count records, as on a real hub, so checkpoints work the same way. Any number
+# of consumer groups can read the files independently.
+class LocalBroker:
+    def __init__(self, root=LOCAL_BROKER_PATH, eventhub_name="stream1", partition_count=LOCAL_PARTITIONS):
+        self.path = os.path.join(root, eventhub_name)
+        self.eventhub_name = eventhub_name
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                partition_count = json.load(f)["partition_count"]
+        else:
+            with open(meta_path, "w") as f:
+                json.dump({"partition_count": partition_count}, f)
+        self.partition_ids = [str(i) for i in range(partition_count)]
+        self._tails = {}  # partition_id -> (sequence number, offset, file end) after this broker's last append
+        for partition_id in self.partition_ids:
+            open(self.partition_path(partition_id), "ab").close()
+
+    def partition_path(self, partition_id):
+        return os.path.join(self.path, f"{partition_id}.log")
+
+    # (sequence number, offset) of the last record in a partition, (-1, -1) when empty
+    def tail(self, partition_id):
+        try:
+            with open(self.partition_path(partition_id) + ".tail", "rb") as f:
+                data = f.read(TAIL.size)
+        except FileNotFoundError:
+            return -1, -1
+        return TAIL.unpack(data) if len(data) == TAIL.size else (-1, -1)
+
+    # Append records to a partition; the sequence numbers continue from the partition's tail.
+    # The tail is scanned for the first append to a partition, then kept in memory (appends
+    # are serialized by the lock); it is only scanned again if the file has grown since, i.e.
+    # another process appended to it.
+    def append(self, partition_id, records):
+        path = self.partition_path(partition_id)
+        with open(path, "ab") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                offset = f.seek(0, os.SEEK_END)
+                cached = self._tails.get(partition_id)
+                if cached is not None and cached[2] == offset:
+                    sequence_number, last_offset, _ = cached
+                else:
+                    sequence_number, last_offset = self._scan_tail(partition_id)
+                now = time.time()
+                chunks = []
+                for body, properties in records:
+                    sequence_number += 1
+                    last_offset = offset
+                    chunks.append(RECORD_HEADER.pack(len(body), len(properties), sequence_number, now))
+                    chunks.append(properties)
+                    chunks.append(body)
+                    offset += RECORD_HEADER.size + len(properties) + len(body)
+                f.write(b"".join(chunks))
+                f.flush()
+                # Overwrite in place (no truncation) so readers never see an empty tail file
+                tail = os.open(path + ".tail", os.O_WRONLY | os.O_CREAT, 0o644)
+                try:
+                    os.write(tail, TAIL.pack(sequence_number, last_offset))
+                finally:
+                    os.close(tail)
+                self._tails[partition_id] = (sequence_number, last_offset, offset)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    # Last sequence number and offset, also counting records a crashed writer appended after the tail file
+    def _scan_tail(self, partition_id):
+        sequence_number, offset = self.tail(partition_id)
+        reader = PartitionReader(self, partition_id, max(offset, 0))
+        try:
+            if offset >= 0:
+                reader.read(1)  # Skip the record the tail file points at
+            while True:
+                events = reader.read(10000)
+                if not events:
+                    return sequence_number, offset
+                sequence_number, offset = events[-1].sequence_number, int(events[-1].offset)
+        finally:
+            reader.close()
+
+# Sequential reader over one partition file from a byte offset
+class PartitionReader:
+    def __init__(self, broker, partition_id, position=0):
+        self.file = open(broker.partition_path(partition_id), "rb")
+        self.position = position
+        self._buffer = b""
+        self._buffer_start = position
+
+    def read(self, max_count):
+        events = []
+        while len(events) < max_count:
+            start = self.position - self._buffer_start
+            if len(self._buffer) - start < RECORD_HEADER.size:
+                if not self._fill(RECORD_HEADER.size):
+                    break
+                continue
+            body_length, properties_length, sequence_number, enqueued_time = RECORD_HEADER.unpack_from(self._buffer, start)
+            end = start + RECORD_HEADER.size + properties_length + body_length
+            if len(self._buffer) < end:
+                if not self._fill(end - start):
+                    break  # Record still being written
+                continue
+            properties_end = start + RECORD_HEADER.size + properties_length
+            events.append(LocalEvent(
+                self._buffer[properties_end:end],
+                json.loads(self._buffer[start + RECORD_HEADER.size:properties_end]),
+                sequence_number,
+                str(self.position),
+                enqueued_time
+            ))
+            self.position += end - start
+        return events
+
+    # Refill the buffer from the current position with at least `needed` bytes; False if not available yet
+    def _fill(self, needed):
+        self.file.seek(self.position)
+        data = self.file.read(max(needed, LOCAL_READ_CHUNK))
+        self._buffer = data
+        self._buffer_start = self.position
+        return len(data) >= needed
+
+    def close(self):
+        self.file.close()
+
+# Producer with the EventHubProducerClient methods batch_producer uses
+class LocalProducerClient:
+    def __init__(self, root=LOCAL_BROKER_PATH, eventhub_name="stream1", partition_count=LOCAL_PARTITIONS):
+        self.broker = LocalBroker(root, eventhub_name, partition_count)
+        self._round_robin = itertools.cycle(self.broker.partition_ids)
+
+    def get_partition_ids(self):
+        return list(self.broker.partition_ids)
+
+    def create_batch(self, partition_id=None, partition_key=None, max_size_in_bytes=None):
+        return LocalEventBatch(max_size_in_bytes, partition_id, partition_key)
+
+    def send_batch(self, event_data_batch, partition_id=None, partition_key=None, timeout=None):
+        if not isinstance(event_data_batch, LocalEventBatch):
+            batch = LocalEventBatch(partition_id=partition_id, partition_key=partition_key)
+            for event in event_data_batch:
+                batch.add(event)
+            event_data_batch = batch
+        partition_id = event_data_batch.partition_id
+        if partition_id is None and event_data_batch.partition_key is not None:
+            key = str(event_data_batch.partition_key).encode("utf-8")
+            partition_id = self.broker.partition_ids[zlib.crc32(key) % len(self.broker.partition_ids)]
+        elif partition_id is None:
+            partition_id = next(self._round_robin)
+        if event_data_batch.records:
+            self.broker.append(str(partition_id), event_data_batch.records)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Asyncio flavour of LocalProducerClient, for batch_producer --async
+class AsyncLocalProducerClient:
+    def __init__(self, root=LOCAL_BROKER_PATH, eventhub_name="stream1", partition_count=LOCAL_PARTITIONS):
+        self._producer = LocalProducerClient(root, eventhub_name, partition_count)
+
+    async def get_partition_ids(self):
+        return self._producer.get_partition_ids()
+
+    async def create_batch(self, partition_id=None, partition_key=None, max_size_in_bytes=None):
+        return self._producer.create_batch(partition_id, partition_key, max_size_in_bytes)
+
+    async def send_batch(self, event_data_batch, **kwargs):
+        self._producer.send_batch(event_data_batch, **kwargs)
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+# PartitionContext for the local broker
+class LocalPartitionContext:
+    def __init__(self, client, partition_id, track_last_enqueued_event_properties):
+        self._client = client
+        self.partition_id = partition_id
+        self.fully_qualified_namespace = client.fully_qualified_namespace
+        self.eventhub_name = client.broker.eventhub_name
+        self.consumer_group = client.consumer_group
+        self._track = track_last_enqueued_event_properties
+        self._last_received_event = None
+
+    @property
+    def last_enqueued_event_properties(self):
+        if not self._track:
+            return None
+        sequence_number, offset = self._client.broker.tail(self.partition_id)
+        return {
+            "sequence_number": sequence_number,
+            "offset": str(offset),
+            "enqueued_time": None,
+            "retrieval_time": datetime.datetime.now(datetime.timezone.utc)
+        }
+
+    def update_checkpoint(self, event=None, **kwargs):
+        event = event or self._last_received_event
+        if self._client.checkpoint_store is None or event is None:
+            return
+        self._client.checkpoint_store.update_checkpoint({
+            "fully_qualified_namespace": self.fully_qualified_namespace,
+            "eventhub_name": self.eventhub_name,
+            "consumer_group": self.consumer_group,
+            "partition_id": self.partition_id,
+            "offset": event.offset,
+            "sequence_number": event.sequence_number
+        })
+
+# Consumer with the EventHubConsumerClient.receive_batch interface batch_consumer uses.
+# Each partition is read on its own thread. Partitions are not load-balanced between
+# processes: receive from one partition per process (see consumer_supervisor.py) or
+# from all of them in one process.
+class LocalConsumerClient:
+    fully_qualified_namespace = "local"
+
+    def __init__(self, root=LOCAL_BROKER_PATH, eventhub_name="stream1", consumer_group="$Default",
+                 checkpoint_store=None, partition_count=LOCAL_PARTITIONS):
+        self.broker = LocalBroker(root, eventhub_name, partition_count)
+        self.consumer_group = consumer_group
+        self.checkpoint_store = checkpoint_store
+        self._stop = threading.Event()
+
+    def get_partition_ids(self):
+        return list(self.broker.partition_ids)
+
+    # Byte offset to start reading a partition from: after its checkpoint, else starting_position
+    def _start_position(self, partition_id, starting_position):
+        if self.checkpoint_store is not None:
+            for checkpoint in self.checkpoint_store.list_checkpoints(self.fully_qualified_namespace, self.broker.eventhub_name, self.consumer_group):
+                if checkpoint["partition_id"] == partition_id and checkpoint.get("offset") is not None:
+                    reader = PartitionReader(self.broker, partition_id, int(checkpoint["offset"]))
+                    reader.read(1)
+                    reader.close()
+                    return reader.position
+        if isinstance(starting_position, dict):
+            starting_position = starting_position.get(partition_id, "@latest")
+        if str(starting_position) in ("-1", "@earliest"):
+            return 0
+        if starting_position in (None, "@latest"):
+            return os.path.getsize(self.broker.partition_path(partition_id))
+        raise ValueError(f"Unsupported starting position for the local broker: {starting_position!r}")
+
+    def _receive_partition(self, partition_id, on_event_batch, on_error, max_batch_size, max_wait_time,
+                           starting_position, track_last_enqueued_event_properties):
+        context = LocalPartitionContext(self, partition_id, track_last_enqueued_event_properties)
+        reader = PartitionReader(self.broker, partition_id, self._start_position(partition_id, starting_position))
+        waited_since = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                events = reader.read(max_batch_size)
+                if not events:
+                    if max_wait_time is not None and time.monotonic() - waited_since >= max_wait_time:
+                        on_event_batch(context, [])
+                        waited_since = time.monotonic()
+                    self._stop.wait(LOCAL_POLL_INTERVAL)
+                    continue
+                context._last_received_event = events[-1]
+                try:
+                    on_event_batch(context, events)
+                except Exception as e:
+                    if on_error is not None:
+                        on_error(context, e)
+                    # Like the Event Hub client, start the partition over from its last checkpoint
+                    reader.close()
+                    reader = PartitionReader(self.broker, partition_id, self._start_position(partition_id, starting_position))
+                waited_since = time.monotonic()
+        finally:
+            reader.close()
+
+    def receive_batch(self, on_event_batch, max_batch_size=300, max_wait_time=None, partition_id=None,
+                      starting_position=None, track_last_enqueued_event_properties=False, on_error=None, **kwargs):
+        self._stop.clear()
+        partition_ids = [partition_id] if partition_id is not None else self.broker.partition_ids
+        threads = [
+            threading.Thread(
+                target=self._receive_partition,
+                args=(str(pid), on_event_batch, on_error, max_batch_size, max_wait_time,
+                      starting_position, track_last_enqueued_event_properties),
+                name=f"local-partition-{pid}",
+                daemon=True
+            )
+            for pid in partition_ids
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+
+    def close(self):
+        self._stop.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Build an event to send on the configured transport; the Azure SDK is only needed for "eventhub"
+def create_event(transport, body, properties=None):
+    if transport == "local":
+        return LocalEventData(body, properties)
+    if transport == "eventhub":
+        from azure.eventhub import EventData
+
+        event = EventData(body)
+        event.properties = properties
+        return event
+    raise ValueError(f"Unknown transport {transport!r}, expected 'eventhub' or 'local'")
+
+# Build a producer/consumer for the configured transport: "eventhub" (Azure, needs a
+# connection string) or "local" (LocalBroker files under broker_path)
+def create_producer_client(transport, eventhub_name, connection_str=None, broker_path=LOCAL_BROKER_PATH,
+                           partition_count=LOCAL_PARTITIONS, use_async=False):
+    if transport == "local":
+        client_class = AsyncLocalProducerClient if use_async else LocalProducerClient
+        return client_class(broker_path, eventhub_name, partition_count)
+    if transport == "eventhub":
+        if use_async:
+            from azure.eventhub.aio import EventHubProducerClient
+        else:
+            from azure.eventhub import EventHubProducerClient
+        return EventHubProducerClient.from_connection_string(conn_str=connection_str, eventhub_name=eventhub_name)
+    raise ValueError(f"Unknown transport {transport!r}, expected 'eventhub' or 'local'")
+
+def create_consumer_client(transport, eventhub_name, consumer_group, connection_str=None, checkpoint_store=None,
+                           broker_path=LOCAL_BROKER_PATH, partition_count=LOCAL_PARTITIONS):
+    if transport == "local":
+        return LocalConsumerClient(broker_path, eventhub_name, consumer_group, checkpoint_store, partition_count)
+    if transport == "eventhub":
+        from azure.eventhub import EventHubConsumerClient
+
+        return EventHubConsumerClient.from_connection_string(
+            conn_str=connection_str,
+            consumer_group=consumer_group,
+            eventhub_name=eventhub_name,
+            checkpoint_store=checkpoint_store
+        )
+    raise ValueError(f"Unknown transport {transport!r}, expected 'eventhub' or 'local'")